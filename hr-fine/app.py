@@ -1,25 +1,50 @@
-import logging
+import asyncio, logging, time
 from contextlib import asynccontextmanager
 import subprocess
-from fastapi import FastAPI
+from anyio import to_thread
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from routes.routes import router
-from database.db import ensure_database_exists, create_db_and_tables
+from database.db import ensure_database_exists, create_db_and_tables, dispose_engines
+from database.query_stats import log_repeated_queries, start_request_stats
+from utils.password_hasher import THREADPOOL_SIZE, shutdown_executor
+from utils.revocation import load_revocations, refresh_revocations_periodically
+from utils.token_purge import purge_expired_tokens_periodically
+from utils.email_outbox import deliver_emails_periodically
+from utils.event_bus import stop_event_bus
+from services.headcount_service import ensure_headcount
+from services.reporting_service import ensure_reporting_lines
+from utils.search_index import build_search_index, rebuild_search_index_periodically
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    background_tasks = []
     try:
         logging.info("Auth Service Starting...")
+        to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
         logging.info("Ensuring database exists and tables are created...")
         ensure_database_exists() 
         create_db_and_tables()
+        ensure_reporting_lines()
+        ensure_headcount()
         logging.info("Database setup complete.")
+        await load_revocations()
+        await build_search_index()
+        background_tasks.append(asyncio.create_task(refresh_revocations_periodically()))
+        background_tasks.append(asyncio.create_task(purge_expired_tokens_periodically()))
+        background_tasks.append(asyncio.create_task(deliver_emails_periodically()))
+        background_tasks.append(asyncio.create_task(rebuild_search_index_periodically()))
         yield
     except Exception as e:
         logging.error(f"Error during service startup: {e}", exc_info=True)
         raise
     finally:
         logging.info("Shutting down...")
+        for task in background_tasks:
+            task.cancel()
+        await dispose_engines()
+        shutdown_executor()
+        stop_event_bus()
 
 app = FastAPI(lifespan=lifespan)
 
@@ -36,4 +61,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def log_request_queries(request: Request, call_next):
+    stats = start_request_stats()
+    start = time.perf_counter()
+    response = await call_next(request)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    logging.info(
+        "%s %s %s %.1fms queries=%d db_time=%.1fms",
+        request.method, request.url.path, response.status_code, elapsed_ms, stats.count, stats.total_ms,
+    )
+    log_repeated_queries(f"{request.method} {request.url.path}", stats)
+    return response
+
 app.include_router(router)
\ No newline at end of file
@@ -4,4 +4,5 @@ AUTH_USER_EMP_ID ="auth_user.emp_id"
 AUTH_USER_EMAIL = "auth_user.email"
 
 ##HTTPError
-ID_NOT_FOUND = "User with ID does not exist."
\ No newline at end of file
+ID_NOT_FOUND = "User with ID does not exist."
+EMP_ID_NOT_EXIST = "Invalid token: Missing emp_id"
\ No newline at end of file
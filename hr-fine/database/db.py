@@ -1,8 +1,12 @@
 from sqlalchemy import create_engine, text
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.exc import OperationalError
 from decouple import config
+from database.pool_metrics import MeteredAsyncQueuePool, MeteredQueuePool, get_pool_status
+from database.query_stats import register_query_listeners
+from database.routing_session import RoutingSession
 
 Base = declarative_base()
 
@@ -11,14 +15,27 @@ mysql_password = config("MYSQL_ROOT_PASSWORD")
 mysql_host = config("MYSQL_HOST")
 mysql_port = config("MYSQL_PORT")
 mysql_db = config("MYSQL_DB")
+mysql_replica_host = config("MYSQL_REPLICA_HOST", default=None)
+mysql_replica_port = config("MYSQL_REPLICA_PORT", default=mysql_port)
+db_echo = config("DB_ECHO", default=False, cast=bool)
+
+pool_options = {
+    "pool_size": config("DB_POOL_SIZE", default=5, cast=int),
+    "max_overflow": config("DB_MAX_OVERFLOW", default=10, cast=int),
+    "pool_timeout": config("DB_POOL_TIMEOUT", default=30, cast=int),
+    "pool_recycle": config("DB_POOL_RECYCLE", default=1800, cast=int),
+    "pool_pre_ping": config("DB_POOL_PRE_PING", default=True, cast=bool),
+}
 
 mysql_url_no_db = f"mysql+pymysql://{mysql_user}:{mysql_password}@{mysql_host}:{mysql_port}"
 db_url = f"mysql+pymysql://{mysql_user}:{mysql_password}@{mysql_host}:{mysql_port}/{mysql_db}"
-print(db_url)
+async_db_url = f"mysql+aiomysql://{mysql_user}:{mysql_password}@{mysql_host}:{mysql_port}/{mysql_db}"
+replica_db_url = f"mysql+pymysql://{mysql_user}:{mysql_password}@{mysql_replica_host}:{mysql_replica_port}/{mysql_db}"
+async_replica_db_url = f"mysql+aiomysql://{mysql_user}:{mysql_password}@{mysql_replica_host}:{mysql_replica_port}/{mysql_db}"
 
 def ensure_database_exists():
     try:
-        engine_no_db = create_engine(mysql_url_no_db, echo=True)
+        engine_no_db = create_engine(mysql_url_no_db, echo=db_echo)
         with engine_no_db.connect() as connection:
             connection.execute(text(f"CREATE DATABASE IF NOT EXISTS `{mysql_db}`;"))
             print(f"Database '{mysql_db}' created or already exists.")
@@ -26,8 +43,36 @@ def ensure_database_exists():
         print(f"Error connecting to MySQL server: {e}")
         raise
 
-engine = create_engine(db_url, echo=True)
+engine = create_engine(db_url, echo=db_echo, poolclass=MeteredQueuePool, **pool_options)
+async_engine = create_async_engine(async_db_url, echo=db_echo, poolclass=MeteredAsyncQueuePool, **pool_options)
+
+## Without MYSQL_REPLICA_HOST the read sessions below simply use the primary.
+if mysql_replica_host:
+    replica_engine = create_engine(replica_db_url, echo=db_echo, poolclass=MeteredQueuePool, **pool_options)
+    async_replica_engine = create_async_engine(async_replica_db_url, echo=db_echo, poolclass=MeteredAsyncQueuePool, **pool_options)
+else:
+    replica_engine = engine
+    async_replica_engine = async_engine
+
+for _engine in {engine, replica_engine, async_engine.sync_engine, async_replica_engine.sync_engine}:
+    register_query_listeners(_engine)
+
 SessionLocal = sessionmaker(bind=engine, expire_on_commit=False)
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, class_=AsyncSession, expire_on_commit=False)
+
+ReadSessionLocal = sessionmaker(
+    class_=RoutingSession,
+    primary=engine,
+    replica=replica_engine,
+    expire_on_commit=False,
+)
+AsyncReadSessionLocal = async_sessionmaker(
+    class_=AsyncSession,
+    sync_session_class=RoutingSession,
+    primary=async_engine.sync_engine,
+    replica=async_replica_engine.sync_engine,
+    expire_on_commit=False,
+)
 
 def create_db_and_tables():
     try:
@@ -42,3 +87,37 @@ def get_session():
         yield session
     finally:
         session.close()
+
+async def get_async_session():
+    """Yields an AsyncSession so `async def` routes don't hold a threadpool slot while waiting on MySQL."""
+    async with AsyncSessionLocal() as session:
+        yield session
+
+def get_read_session():
+    """Session for read-mostly routes: reads go to the replica until the first write."""
+    session = ReadSessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+async def get_async_read_session():
+    async with AsyncReadSessionLocal() as session:
+        yield session
+
+async def dispose_engines():
+    await async_engine.dispose()
+    engine.dispose()
+    if mysql_replica_host:
+        await async_replica_engine.dispose()
+        replica_engine.dispose()
+
+def get_db_pool_status() -> dict:
+    status = {
+        "sync": get_pool_status(engine),
+        "async": get_pool_status(async_engine.sync_engine),
+    }
+    if mysql_replica_host:
+        status["replica_sync"] = get_pool_status(replica_engine)
+        status["replica_async"] = get_pool_status(async_replica_engine.sync_engine)
+    return status
@@ -0,0 +1,60 @@
+"""
+Runs EXPLAIN on the hot lookup queries and reports any that fall back to a full table scan.
+
+    python -m database.explain_check
+
+Run it against a database with realistic data; on near-empty tables MySQL may
+prefer a scan even when a usable index exists.
+"""
+import sys
+from datetime import date, datetime, timedelta
+from sqlalchemy import select, text
+from sqlalchemy.dialects import mysql
+
+from database.db import engine
+from models.auth_model import RefreshToken
+from utils.jwt_util import token_digest
+from utils.token_purge import TOKEN_PURGE_BATCH_SIZE, purgeable_conditions
+from services.project_service import project_assigned_query
+from services.reporting_service import reports_query
+from services.timesheet_service import time_stamps_query
+from services.user_service import employee_dashboard_query, encode_dashboard_cursor
+
+def hot_queries():
+    today = date.today()
+    start_of_week = today - timedelta(days=today.weekday())
+    expired, revoked = purgeable_conditions(datetime.now())
+    return {
+        "fetch_time_stamps_async": time_stamps_query("68001", start_of_week, start_of_week + timedelta(days=6)),
+        "get_project_assigned_async": project_assigned_query("68001"),
+        "get_reports": reports_query("68001", transitive=True),
+        "get_all_employees_dashboard_async": employee_dashboard_query(cursor=encode_dashboard_cursor("asc", "68001"), limit=50),
+        "logout_user": select(RefreshToken).filter(
+            RefreshToken.user_id == 1,
+            RefreshToken.access_token_digest == token_digest("token"),
+        ),
+        "access_refresh_token": select(RefreshToken).filter(
+            RefreshToken.user_id == 1,
+            RefreshToken.refresh_token_digest == token_digest("token"),
+            RefreshToken.status == True,
+        ),
+        "purge_expired_tokens (expired)": select(RefreshToken.id).filter(*expired).limit(TOKEN_PURGE_BATCH_SIZE),
+        "purge_expired_tokens (revoked)": select(RefreshToken.id).filter(*revoked).limit(TOKEN_PURGE_BATCH_SIZE),
+    }
+
+def explain(connection, statement):
+    sql = str(statement.compile(dialect=mysql.dialect(), compile_kwargs={"literal_binds": True}))
+    return connection.execute(text(f"EXPLAIN {sql}")).mappings().all()
+
+def main() -> int:
+    failures = 0
+    with engine.connect() as connection:
+        for name, statement in hot_queries().items():
+            for row in explain(connection, statement):
+                uses_index = row["type"] != "ALL"
+                failures += not uses_index
+                print(f"{'OK  ' if uses_index else 'SCAN'} {name}: table={row['table']} type={row['type']} key={row['key']} rows={row['rows']}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
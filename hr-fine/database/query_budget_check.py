@@ -0,0 +1,55 @@
+"""
+Runs login and refresh against a throwaway in-memory database and fails if either
+issues more statements than its budget.
+
+    python -m database.query_budget_check
+
+Login is one user lookup plus the session INSERT; refresh is the token lookup, the
+user lookup for the new access token's claims, and the UPDATE.
+"""
+import sys
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from database.db import Base
+from database.query_stats import assert_max_queries, register_query_listeners
+from models.auth_model import Users
+from schemas.auth_schema import UserLogin
+from services.auth_service import access_refresh_token, login_user
+from utils.jwt_util import get_hashed_password
+
+LOGIN_MAX_QUERIES = 2
+REFRESH_MAX_QUERIES = 3
+
+def check_auth_query_budgets(session) -> dict:
+    """Seeds one user and returns {path: statements run}; raises AssertionError over budget."""
+    session.add(Users(emp_id="68001", email="budget@example.com", password=get_hashed_password("budget-check")))
+    session.commit()
+
+    counts = {}
+    with assert_max_queries(LOGIN_MAX_QUERIES) as stats:
+        tokens = login_user(UserLogin(emp_id="68001", password="budget-check"), session)
+    counts["login_user"] = stats.count
+
+    with assert_max_queries(REFRESH_MAX_QUERIES) as stats:
+        access_refresh_token(tokens["refresh_token"], session)
+    counts["access_refresh_token"] = stats.count
+    return counts
+
+def main() -> int:
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    register_query_listeners(engine)
+    Base.metadata.create_all(engine)
+    with sessionmaker(bind=engine, expire_on_commit=False)() as session:
+        try:
+            counts = check_auth_query_budgets(session)
+        except AssertionError as e:
+            print(f"OVER {e}")
+            return 1
+    for name, count in counts.items():
+        print(f"OK   {name}: {count} queries")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Optional, Tuple
+from decouple import config
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERY_MS = config("SLOW_QUERY_MS", default=200, cast=float)
+# How many times one statement may repeat in a request before it is treated as an N+1.
+N_PLUS_ONE_THRESHOLD = config("N_PLUS_ONE_THRESHOLD", default=5, cast=int)
+# "off", "log" or "raise"; use "raise" in dev to fail the request at the offending query.
+N_PLUS_ONE_MODE = config("N_PLUS_ONE_MODE", default="log")
+
+_request_stats: ContextVar[Optional["QueryStats"]] = ContextVar("request_query_stats", default=None)
+# Stats opened by assert_max_queries; fed from every thread so they see queries made inside the app under test.
+_watchers: List["QueryStats"] = []
+
+_WHITESPACE = re.compile(r"\s+")
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))*\s*\)")
+
+class NPlusOneError(Exception):
+    pass
+
+class QueryStats:
+    def __init__(self, raise_on_repeat: bool = False):
+        self.count = 0
+        self.total_ms = 0.0
+        self.statements = Counter()
+        self.raise_on_repeat = raise_on_repeat
+
+    def record(self, statement: str, duration_ms: float):
+        self.count += 1
+        self.total_ms += duration_ms
+        if N_PLUS_ONE_MODE != "off":
+            sql = normalize_sql(statement)
+            self.statements[sql] += 1
+            if self.raise_on_repeat and self.statements[sql] > N_PLUS_ONE_THRESHOLD:
+                raise NPlusOneError(f"Statement repeated {self.statements[sql]} times in one request: {sql}")
+
+    def repeated(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> List[Tuple[str, int]]:
+        return [(sql, n) for sql, n in self.statements.most_common() if n > threshold]
+
+def normalize_sql(statement: str) -> str:
+    """Strips literals and collapses IN lists so the same query always logs the same way."""
+    sql = _WHITESPACE.sub(" ", statement).strip()
+    sql = _STRING_LITERAL.sub("?", sql)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    return _IN_LIST.sub("(?)", sql)
+
+def count_params(parameters, executemany: bool) -> int:
+    if not parameters:
+        return 0
+    if executemany:
+        return sum(len(params) for params in parameters)
+    return len(parameters)
+
+def start_request_stats() -> QueryStats:
+    stats = QueryStats(raise_on_repeat=N_PLUS_ONE_MODE == "raise")
+    _request_stats.set(stats)
+    return stats
+
+def get_request_stats() -> Optional[QueryStats]:
+    return _request_stats.get()
+
+def log_repeated_queries(label: str, stats: QueryStats):
+    for sql, n in stats.repeated():
+        logger.warning("Possible N+1 in %s: statement ran %d times: %s", label, n, sql)
+
+@contextmanager
+def assert_max_queries(limit: int):
+    """
+    Test helper that fails if the wrapped block runs more than `limit` statements.
+
+        with assert_max_queries(3):
+            client.get("/hr-fine/time-stamp/fetch-time-stamps", headers=headers)
+    """
+    stats = QueryStats()
+    _watchers.append(stats)
+    try:
+        yield stats
+    finally:
+        _watchers.remove(stats)
+    if stats.count > limit:
+        details = "\n".join(f"  {n}x {sql}" for sql, n in stats.statements.most_common())
+        raise AssertionError(f"Expected at most {limit} queries, ran {stats.count}:\n{details}")
+
+## The start time lives on the statement's execution context, not a per-connection stack:
+## a statement that raises never reaches after_cursor_execute, and its context is simply dropped.
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_start = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration_ms = (time.perf_counter() - context._query_start) * 1000
+
+    for watcher in list(_watchers):
+        watcher.record(statement, duration_ms)
+
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.record(statement, duration_ms)
+
+    if duration_ms >= SLOW_QUERY_MS:
+        logger.warning(
+            "Slow query (%.1f ms, %d params): %s",
+            duration_ms,
+            count_params(parameters, executemany),
+            normalize_sql(statement),
+        )
+
+def register_query_listeners(engine):
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
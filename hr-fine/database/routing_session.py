@@ -0,0 +1,27 @@
+from sqlalchemy import Delete, Insert, Update, event
+from sqlalchemy.orm import Session
+
+class RoutingSession(Session):
+    """
+    Sends reads to the replica engine and everything else to the primary.
+
+    Once the session flushes or executes a DML statement it is pinned to the primary
+    for the rest of its life, so a request always reads its own writes.
+    """
+
+    def __init__(self, primary=None, replica=None, **kw):
+        super().__init__(**kw)
+        self.primary = primary
+        self.replica = replica if replica is not None else primary
+        self.pinned_to_primary = False
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if isinstance(clause, (Insert, Update, Delete)):
+            self.pinned_to_primary = True
+        if self.pinned_to_primary or self._flushing:
+            return self.primary
+        return self.replica
+
+@event.listens_for(RoutingSession, "after_flush")
+def _pin_after_flush(session, flush_context):
+    session.pinned_to_primary = True
@@ -0,0 +1,74 @@
+"""
+Fills access_token_digest / refresh_token_digest for refresh_token rows written before
+the digest columns existed, so those sessions can still refresh and log out.
+
+    python -m database.token_digest_backfill
+
+Run it once after the migration that adds the digest columns; it only touches rows
+with a missing digest, so running it again is a no-op.
+
+Tokens minted before access tokens carried a jti could repeat (same user, same
+second). The digests are unique, so only the newest row of such a repeat gets one;
+the older duplicates were unreachable by the plaintext lookup's .first() anyway.
+"""
+import sys
+from sqlalchemy import or_, select, update
+from sqlalchemy.orm import Session
+
+from database.db import SessionLocal
+from models.auth_model import RefreshToken
+from utils.jwt_util import token_digest
+
+TOKEN_BACKFILL_BATCH_SIZE = 1000
+
+def _taken_digests(session: Session, column, digests) -> set:
+    return set(session.scalars(select(column).where(column.in_(digests))))
+
+def backfill_token_digests(session: Session, batch_size: int = TOKEN_BACKFILL_BATCH_SIZE) -> int:
+    """Digests the plaintext tokens of rows missing either digest, newest first; returns rows updated."""
+    updated = 0
+    last_id = None
+    while True:
+        query = (
+            select(RefreshToken.id, RefreshToken.access_token, RefreshToken.refresh_token,
+                   RefreshToken.access_token_digest, RefreshToken.refresh_token_digest)
+            .where(or_(RefreshToken.access_token_digest.is_(None), RefreshToken.refresh_token_digest.is_(None)))
+            .order_by(RefreshToken.id.desc())
+            .limit(batch_size)
+        )
+        if last_id is not None:
+            query = query.where(RefreshToken.id < last_id)
+        rows = session.execute(query).all()
+        if not rows:
+            return updated
+        last_id = rows[-1].id
+
+        access = {row.id: token_digest(row.access_token) for row in rows if row.access_token_digest is None}
+        refresh = {row.id: token_digest(row.refresh_token) for row in rows if row.refresh_token_digest is None}
+        taken_access = _taken_digests(session, RefreshToken.access_token_digest, set(access.values()))
+        taken_refresh = _taken_digests(session, RefreshToken.refresh_token_digest, set(refresh.values()))
+
+        changes = []
+        for row in rows:
+            change = {}
+            if row.id in access and access[row.id] not in taken_access:
+                change["access_token_digest"] = access[row.id]
+                taken_access.add(access[row.id])
+            if row.id in refresh and refresh[row.id] not in taken_refresh:
+                change["refresh_token_digest"] = refresh[row.id]
+                taken_refresh.add(refresh[row.id])
+            if change:
+                changes.append({"id": row.id, **change})
+        ## rows differ in which digest they miss, so each gets its own UPDATE by primary key
+        for change in changes:
+            session.execute(update(RefreshToken).where(RefreshToken.id == change.pop("id")).values(**change))
+        session.commit()
+        updated += len(changes)
+
+def main() -> int:
+    with SessionLocal() as session:
+        print(f"Backfilled token digests: {backfill_token_digests(session)} rows")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Boolean, Column, Integer, String, Date, DateTime, ForeignKey
+from sqlalchemy import Boolean, Column, Integer, String, Date, DateTime, ForeignKey, Index, Text
 from sqlalchemy.orm import relationship
 from database.db import Base
 from models.timesheet_model import TimeStamp
@@ -34,5 +34,40 @@ class RefreshToken(Base):
     user_id = Column(Integer, ForeignKey(Users.id))
     access_token = Column(String(450), nullable=False)
     refresh_token = Column(String(450), nullable=False)
+    ## SHA-256 hex of the tokens above; lookups use these instead of the 450-char columns.
+    access_token_digest = Column(String(64), unique=True, nullable=True)
+    refresh_token_digest = Column(String(64), unique=True, nullable=True)
+    ## carried as the "sid" claim of every access token minted for this session, so a
+    ## logout revokes all of them, not just the latest; see utils/revocation.py
+    session_id = Column(String(32), unique=True, nullable=True)
     status = Column(Boolean)
     created_date = Column(DateTime, default=datetime.now)
+    revoked_date = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        ## token purge: created_date < expiry cutoff
+        Index("ix_refresh_token_created_date", "created_date"),
+        ## token purge: status = false AND revoked_date < cutoff
+        Index("ix_refresh_token_status_revoked_date", "status", "revoked_date"),
+    )
+
+class EmpIdSequence(Base):
+    """Last employee number handed out per Thai year; see services/emp_id_allocator.py."""
+    __tablename__ = "emp_id_sequence"
+    year = Column(Integer, primary_key=True, autoincrement=False)
+    last_number = Column(Integer, nullable=False, default=0)
+
+class BulkRegistrationJob(Base):
+    """Progress and outcome of one /auth/addUsers upload; see services/auth_service.py."""
+    __tablename__ = "bulk_registration_job"
+    id = Column(String(36), primary_key=True)
+
+    status = Column(String(20), nullable=False, default="queued")  ### queued / running / done / failed
+    total = Column(Integer, nullable=False)
+    created = Column(Integer, nullable=False, default=0)
+    failed = Column(Integer, nullable=False, default=0)
+    ## JSON list of BulkUserResult. Temporary passwords are not stored; they go out in the welcome mail.
+    results = Column(Text, nullable=True)
+    error = Column(String(500), nullable=True)
+    created_date = Column(DateTime, default=datetime.now)
+    finished_date = Column(DateTime, nullable=True)
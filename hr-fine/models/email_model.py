@@ -0,0 +1,26 @@
+from datetime import datetime
+from sqlalchemy import Column, DateTime, Index, Integer, String, Text
+from database.db import Base
+
+class EmailOutbox(Base):
+    __tablename__ = "email_outbox"
+    id = Column(Integer, primary_key=True, index=True)
+
+    to_email = Column(String(100), nullable=False)
+    subject = Column(String(200), nullable=False)
+    ## Cleared once delivered or finally failed: bodies carry temporary passwords.
+    body = Column(Text, nullable=True)
+
+    status = Column(String(20), nullable=False, default="pending")  ### pending / sending / sent / failed
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(String(500), nullable=True)
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.now)
+    created_date = Column(DateTime, default=datetime.now)
+    sent_date = Column(DateTime, nullable=True)
+    ## set while a sender owns the row (status = 'sending'); see utils/email_outbox.py
+    claimed_date = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        ## sender poll: status = 'pending' AND next_attempt_at <= now ORDER BY id
+        Index("ix_email_outbox_status_next_attempt", "status", "next_attempt_at"),
+    )
@@ -1,5 +1,5 @@
 from datetime import date, datetime
-from sqlalchemy import Boolean, Column, ForeignKeyConstraint, Integer, String, Date, DateTime, ForeignKey, Float, Double
+from sqlalchemy import Boolean, Column, ForeignKeyConstraint, Index, Integer, String, Date, DateTime, ForeignKey, Float, Double
 from database.db import Base
 from sqlalchemy.orm import relationship
 
@@ -82,6 +82,8 @@ class ProjectMember(Base):
     member_position = relationship("HiringInfo", back_populates="project_members_position")
     __table_args__ = (
         ForeignKeyConstraint(["position_id"], ["hiring_info.position"], onupdate="CASCADE", ondelete="CASCADE"),
+        ## get_project_assigned_async: member_id = ? joined back to project_details on project_id
+        Index("ix_project_member_member_project", "member_id", "project_id"),
     )
 
 class ProjectType(Base):
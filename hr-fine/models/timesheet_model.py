@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Boolean, Column, Integer, String, Date, DateTime, ForeignKey, Time
+from sqlalchemy import Boolean, Column, Index, Integer, String, Date, DateTime, ForeignKey, Time
 from sqlalchemy.orm import relationship
 from database.db import Base
 
@@ -25,4 +25,9 @@ class TimeStamp(Base):
 
     user = relationship("Users", back_populates="time_stamp")
     project = relationship("ProjectDetails", back_populates="project_progress")
-    period = relationship("ProjectPlan", back_populates="period_progress")
\ No newline at end of file
+    period = relationship("ProjectPlan", back_populates="period_progress")
+
+    __table_args__ = (
+        ## fetch_time_stamps_async: emp_id = ? AND stamp_date BETWEEN week ORDER BY stamp_date, start_time
+        Index("ix_time_stamp_emp_date_start", "emp_id", "stamp_date", "start_time"),
+    )
\ No newline at end of file
@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Boolean, Column, ForeignKeyConstraint, Integer, String, Date, DateTime, ForeignKey, Float, Double
+from sqlalchemy import Boolean, Column, ForeignKeyConstraint, Index, Integer, String, UniqueConstraint, Date, DateTime, ForeignKey, Float, Double
 from database.db import Base
 from sqlalchemy.orm import relationship
 from models.project_model import ProjectDetails
@@ -96,11 +96,43 @@ class HiringInfo(Base):
     position = Column(Integer, ForeignKey("position.id", onupdate="CASCADE", ondelete="CASCADE"), nullable=False)    
     manager = Column(String(100), nullable=False)
 
+    __table_args__ = (
+        ## /employees filters
+        Index("ix_hiring_info_location_status", "working_location", "working_status"),
+    )
+
     user = relationship("Users", back_populates="hiring_info")
     emp_department = relationship("Department", back_populates="hiring_info")
     emp_position = relationship("Position", back_populates="hiring_info")
     project_members_position = relationship("ProjectMember", back_populates="member_position")
 
+class Headcount(Base):
+    """Employees per combination of the HiringInfo dimensions; see services/headcount_service.py."""
+    __tablename__ = "headcount"
+    id = Column(Integer, primary_key=True, index=True)
+    department = Column(Integer, nullable=False)
+    position = Column(Integer, nullable=False)
+    working_location = Column(String(50), nullable=False)
+    emp_type = Column(String(50), nullable=False)
+    working_status = Column(String(30), nullable=False)
+    headcount = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint("department", "position", "working_location", "emp_type", "working_status", name="uq_headcount_dimensions"),
+    )
+
+class ReportingLine(Base):
+    """Closure of HiringInfo.manager: one row per (manager, report) pair at any depth, plus self rows at depth 0."""
+    __tablename__ = "reporting_line"
+    ancestor = Column(String(100), primary_key=True)
+    descendant = Column(String(100), primary_key=True)
+    depth = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        Index("ix_reporting_line_ancestor_depth", "ancestor", "depth"),
+        Index("ix_reporting_line_descendant_depth", "descendant", "depth"),
+    )
+
     
 class PaymentInfo(Base):
     __tablename__ = "payment_info"
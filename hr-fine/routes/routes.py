@@ -1,26 +1,37 @@
 from datetime import date
-from fastapi import APIRouter, Depends,HTTPException, Path
+from fastapi import APIRouter, Depends,HTTPException, Path, Query, Request, Response, UploadFile
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from utils.jwt_bearer import JWTBearer, decode_jwt
-from database.db import get_session
-from schemas.auth_schema import ChangeTempPassRequest, ResetPasswordRequest, UserLogin, UserRegister, ChangePassword
+from utils.jwt_bearer import JWTBearer, TokenClaims
+from utils.token_purge import purge_stats
+from utils.email_outbox import get_outbox_status
+from utils.employee_cache import employee_cache
+from utils.reference_cache import reference_cache
+from utils.search_index import SEARCH_MAX_LIMIT, search_index
+from database.db import get_async_read_session, get_async_session, get_db_pool_status, get_read_session, get_session
+from schemas.auth_schema import BulkRegistrationJob, BulkUserRow, ChangeTempPassRequest, ResetPasswordRequest, UserLogin, UserRegister, ChangePassword
 from services import auth_service
 
 from models.user_model import AddressInfo, DeductionInfo, HiringInfo, PaymentInfo,  PersonalInfo, RegistrationAddress
 
-from typing import List, Optional
-from schemas.user_schema import EmployeeDashboardInfo, EmployeeDetails, SubmitAllInfoData, SubmitHiringInfo, SubmitPaymentInfo, SubmitUserInfo, UpdateAddressInfo, UpdateContactInfo, UpdateDeductionInfo, UpdateHiringInfo, UpdatePaymentInfo, UpdatePersonalInfo, UpdateRegistrationAddress
+from typing import List, Literal, Optional
+from schemas.user_schema import EmployeeDashboardPage, EmployeeDetails, ReportSummary, SubmitAllInfoData, SubmitHiringInfo, SubmitPaymentInfo, SubmitUserInfo, UpdateAddressInfo, UpdateContactInfo, UpdateDeductionInfo, UpdateEmployeeRecord, UpdateHiringInfo, UpdatePaymentInfo, UpdatePersonalInfo, UpdateRegistrationAddress
 from schemas.optional_schema import AddCompany, AddContractType, AddDepartment, AddEmployeeType, AddPosition, AddProjectType, AddWorkingStatus, EditPosition, FetchCompany, FetchContractType, FetchDepartment, FetchEmployeeType, FetchPosition, FetchWorkingStatus, ResProjectType
 from schemas.client_schema import ClientDashboardInfo, CreateClient, EditClient, GenerateClientCode
 from schemas.project_schema import  GenerateProjectCode, PlanEdit,  ProjectAllDetails, ProjectAssigned, ProjectDetailEdit, ProjectDurationEdit, ProjectMemberBase, ProjectMemberEdit, SubmitallProjectData, ProjectDashboardinfo
+from schemas.search_schema import SearchResult
 from schemas.timesheet_schemas import CalculateTotalTime, TimeStampBase, TimeStampResponseSchema
 
-from services.user_service import get_all_employees_dashboard, get_employee_details_by_id, submit_all_user_data, update_address_info, update_contact_info, update_deduction_info, update_hiring_info, update_or_create_employee_info, update_payment_info, update_personal_info, update_registration_address
-from services.optional_service import add_company, add_contract_type, add_department, add_employee_type, add_position, create_project_type, edit_position, add_working_status, response_project_type, fetch_company, fetch_contract, fetch_department, fetch_emp_type, fetch_working_status, fetch_positions
+from services.user_service import EMPLOYEE_DASHBOARD_MAX_LIMIT, get_all_employees_dashboard_async, get_employee_details_json, patch_employee_record, submit_all_user_data, update_address_info, update_contact_info, update_deduction_info, update_hiring_info, update_or_create_employee_info, update_payment_info, update_personal_info, update_registration_address
+from services.optional_service import add_company, fetch_all_reference_data, add_contract_type, add_department, add_employee_type, add_position, create_project_type, edit_position, add_working_status, response_project_type, fetch_company, fetch_contract, fetch_department, fetch_emp_type, fetch_working_status, fetch_positions
 from services.client_service import create_client_info, get_client_dashboard, edit_client_info
-from services.project_service import create_project_member, delete_project_member, fetch_managers, generate_project_code, get_project_assigned, get_project_dashboard, get_project_details_by_id, submit_all_project_data, update_member, update_plan, update_project_details, update_project_durations
-from services.timesheet_service import calculate_total_time, delete_time_stamp, edit_time_stamp, fetch_time_stamps, stamp_timesheet
+from services.project_service import create_project_member, delete_project_member, fetch_managers, generate_project_code, get_project_assigned_async, get_project_dashboard, get_project_details_by_id, submit_all_project_data, update_member, update_plan, update_project_details, update_project_durations
+from services.headcount_service import get_headcount
+from services.reporting_service import get_reports
+from services.export_service import resolve_export_columns, stream_employee_export
+from services.timesheet_service import calculate_total_time, delete_time_stamp, edit_time_stamp, fetch_time_stamps_async, stamp_timesheet_async
 
 
 
@@ -34,6 +45,19 @@ router = APIRouter(
 def register_user_endpoint(user: UserRegister, session: Session=Depends(get_session)):
     return auth_service.register_user(user, session)
 
+@router.post("/auth/addUsers", dependencies=[Depends(JWTBearer())], tags=["Auth"], response_model=BulkRegistrationJob, status_code=202)
+def register_users_bulk_endpoint(users: List[BulkUserRow], session: Session=Depends(get_session)):
+    return auth_service.register_users_bulk(users, session)
+
+@router.post("/auth/addUsers/csv", dependencies=[Depends(JWTBearer())], tags=["Auth"], response_model=BulkRegistrationJob, status_code=202)
+def register_users_csv_endpoint(file: UploadFile, session: Session=Depends(get_session)):
+    users = auth_service.parse_bulk_users_csv(file.file.read())
+    return auth_service.register_users_bulk(users, session)
+
+@router.get("/auth/addUsers/jobs/{job_id}", dependencies=[Depends(JWTBearer())], tags=["Auth"], response_model=BulkRegistrationJob)
+def bulk_registration_job_endpoint(job_id: str, session: Session=Depends(get_session)):
+    return auth_service.get_bulk_registration_job(job_id, session)
+
 @router.post("/auth/login", tags=["Auth"])
 def login_user_endpoint(request: UserLogin, session: Session=Depends(get_session)):
     return auth_service.login_user(request, session)
@@ -43,9 +67,9 @@ def logout_user_endpoint(dependencies=Depends(JWTBearer()), session: Session = D
     return auth_service.logout_user(dependencies, session)
 
 @router.post("/auth/change-password", dependencies=[Depends(JWTBearer())], tags=["Auth"])
-def change_password_endpoint(request: ChangePassword, session: Session=Depends(get_session), current_user: dict = Depends(JWTBearer)):
-    user_id = current_user["sub"]
-    return auth_service.change_password(user_id,request, session)
+def change_password_endpoint(request: ChangePassword, session: Session=Depends(get_session), current_user: TokenClaims = Depends(JWTBearer())):
+    emp_id = current_user["emp_id"]
+    return auth_service.change_password(emp_id,request, session)
 
 @router.post("/auth/change-temp-password", dependencies=[Depends(JWTBearer())], tags=["Auth"])
 def change_temp_password_endpoint(request: ChangeTempPassRequest, session: Session = Depends(get_session)):
@@ -68,13 +92,63 @@ def reset_password_endpoint(request: ResetPasswordRequest, db: Session = Depends
 def submit_all_info(data: SubmitAllInfoData, db: Session = Depends(get_session)):
     return submit_all_user_data(db, data)
 
-@router.get("/employees", response_model=List[EmployeeDashboardInfo], dependencies=[Depends(JWTBearer())], tags=["Employee"])
-def fetch_employee_dashboard_info(db: Session = Depends(get_session)):
-    return get_all_employees_dashboard(db)
+@router.get("/employees", response_model=EmployeeDashboardPage, dependencies=[Depends(JWTBearer())], tags=["Employee"])
+async def fetch_employee_dashboard_info(
+    limit: int = Query(50, ge=1, le=EMPLOYEE_DASHBOARD_MAX_LIMIT),
+    cursor: Optional[str] = None,
+    order: Literal["asc", "desc"] = "asc",
+    sort: Optional[str] = None,
+    department: Optional[int] = None,
+    position: Optional[int] = None,
+    working_location: Optional[str] = None,
+    working_status: Optional[str] = None,
+    include_total: bool = False,
+    db: AsyncSession = Depends(get_async_read_session),
+):
+    ## pages are keyed on emp_id only; refuse the old sort keys rather than silently ignore them
+    if sort is not None and sort != "emp_id":
+        raise HTTPException(status_code=400, detail="The employee list is ordered by emp_id only; use the filters to narrow it.")
+    return await get_all_employees_dashboard_async(
+        db, limit=limit, cursor=cursor, order=order, include_total=include_total,
+        department=department, position=position, working_location=working_location, working_status=working_status,
+    )
+
+@router.get("/employees/headcount", dependencies=[Depends(JWTBearer())], tags=["Employee"])
+def fetch_headcount(
+    by: List[Literal["department", "position", "working_location", "emp_type", "working_status"]] = Query([]),
+    db: Session = Depends(get_read_session),
+):
+    """Headcount from the maintained aggregate, broken down by any of the hiring dimensions (e.g. `?by=department&by=working_status`)."""
+    return get_headcount(db, list(dict.fromkeys(by)))
+
+@router.get("/employees/export", dependencies=[Depends(JWTBearer())], tags=["Employee"])
+def export_employees(format: Literal["csv", "ndjson"] = "csv", columns: Optional[str] = None):
+    """Streams every employee as CSV or NDJSON; `columns` is a comma-separated subset, e.g. `emp_id,email,hiring_info.start_date`."""
+    names = resolve_export_columns(columns)
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        stream_employee_export(names, format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="employees.{format}"'},
+    )
 
 @router.get("/employee/{emp_id}", response_model=EmployeeDetails, dependencies=[Depends(JWTBearer())], tags=["Employee"])
 def fetch_employee_details(emp_id: str, db: Session = Depends(get_session)):
-    return get_employee_details_by_id(db, emp_id)
+    return Response(content=get_employee_details_json(db, emp_id), media_type="application/json")
+
+@router.get("/employee/{emp_id}/reports", response_model=List[ReportSummary], dependencies=[Depends(JWTBearer())], tags=["Employee"])
+def fetch_reports(
+    emp_id: str,
+    transitive: bool = False,
+    max_depth: Optional[int] = Query(None, ge=1),
+    db: Session = Depends(get_read_session),
+):
+    """Direct reports of `emp_id`, or everyone under them when `transitive` is set."""
+    return get_reports(db, emp_id, transitive, max_depth)
+
+@router.patch("/employee/{emp_id}", response_model=EmployeeDetails, dependencies=[Depends(JWTBearer())], tags=["Employee"])
+def patch_employee(emp_id: str, data: UpdateEmployeeRecord, db: Session = Depends(get_session)):
+    return patch_employee_record(db, emp_id, data)
 
 @router.put("/personal-info/{emp_id}", dependencies=[Depends(JWTBearer())], tags=["Employee"])
 def edit_personal_info(emp_id: str, data: UpdatePersonalInfo, db: Session = Depends(get_session)):
@@ -138,36 +212,45 @@ def edit_position_endpoint(request: EditPosition, db: Session = Depends(get_sess
     return edit_position(request, db)
 
 @router.get("/optional/companies", dependencies=[Depends(JWTBearer())], response_model=List[FetchCompany], tags=["Optional Data"])
-def fetch_company_endpoint(db: Session =Depends(get_session)):
-    return fetch_company(db)
+def fetch_company_endpoint():
+    return fetch_company()
 
 @router.get("/optional/employee-types", dependencies=[Depends(JWTBearer())], response_model=List[FetchEmployeeType], tags=["Optional Data"])
-def fetch_employee_type_endpoint(db: Session =Depends(get_session)):
-    return fetch_emp_type(db)
+def fetch_employee_type_endpoint():
+    return fetch_emp_type()
 
 @router.get("/optional/contract-types", dependencies=[Depends(JWTBearer())], response_model=List[FetchContractType], tags=["Optional Data"])
-def fetch_contract_type_endpoint(db: Session =Depends(get_session)):
-    return fetch_contract(db)
+def fetch_contract_type_endpoint():
+    return fetch_contract()
 
 @router.get("/optional/departments", dependencies=[Depends(JWTBearer())], response_model=List[FetchDepartment], tags=["Optional Data"])
-def fetch_department_endpoint(db: Session =Depends(get_session)):
-    return fetch_department(db)
+def fetch_department_endpoint():
+    return fetch_department()
 
 @router.get("/optional/working-status", dependencies=[Depends(JWTBearer())], response_model=List[FetchWorkingStatus], tags=["Optional Data"])
-def fetch_working_status_endpoint(db: Session =Depends(get_session)):
-    return fetch_working_status(db)
+def fetch_working_status_endpoint():
+    return fetch_working_status()
 
 @router.get("/optional/positions", dependencies=[Depends(JWTBearer())], response_model=List[FetchPosition], tags=["Optional Data"])
-def fetch_position_endpoint(db: Session= Depends(get_session)):
-    return fetch_positions(db)
+def fetch_position_endpoint():
+    return fetch_positions()
 
 @router.get("/optional/project-types", dependencies=[Depends(JWTBearer())], response_model=List[ResProjectType], tags=["Optional Data"])
-def response_project_types(db: Session = Depends(get_session)):
-    return response_project_type(db)
+def response_project_types():
+    return response_project_type()
+
+@router.get("/optional/all", dependencies=[Depends(JWTBearer())], tags=["Optional Data"])
+def fetch_all_optional_data(request: Request):
+    """Every lookup above in one cached document; send the ETag back as If-None-Match to get a 304."""
+    content, etag = fetch_all_reference_data()
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=content, media_type="application/json", headers=headers)
 
 ### Client
 @router.get("/clients", response_model=List[ClientDashboardInfo], dependencies=[Depends(JWTBearer())], tags=["Client"])
-def fetch_clients_dashboard_info(db: Session = Depends(get_session)):
+def fetch_clients_dashboard_info(db: Session = Depends(get_read_session)):
     return get_client_dashboard(db)
 
 @router.put("/client/edit-client", dependencies=[Depends(JWTBearer())], tags=["Client"])
@@ -215,7 +298,7 @@ def add_project_member(
         return {"status": "error", "message": str(e.detail)}
 
 @router.get("/projects", response_model=List[ProjectDashboardinfo], dependencies=[Depends(JWTBearer())], tags=["Project"])
-def fetch_project_dashboard_info(db: Session = Depends(get_session)):
+def fetch_project_dashboard_info(db: Session = Depends(get_read_session)):
     return get_project_dashboard(db)
 
 @router.get("/projects/{project_id}", response_model=ProjectAllDetails, dependencies=[Depends(JWTBearer())], tags=["Project"])
@@ -228,12 +311,12 @@ def get_managers(db: Session = Depends(get_session)):
     return fetch_managers(db)
 
 @router.get("/timesheet/projects", response_model=List[ProjectAssigned], tags=["Project"])
-def get_assigned_projects(
-    db: Session = Depends(get_session),
-    auth: str = Depends(JWTBearer())
+async def get_assigned_projects(
+    db: AsyncSession = Depends(get_async_session),
+    auth: TokenClaims = Depends(JWTBearer())
 ):
     try:
-        return get_project_assigned(db, auth)
+        return await get_project_assigned_async(db, auth)
     except HTTPException as e:
         raise e
     except Exception as e:
@@ -283,37 +366,65 @@ def delete_member(
 
 
 ##Time Stamp
-@router.post("/time-stamp/submit-time-stamp", dependencies=[Depends(JWTBearer())], tags=["TimeStamp"])
-def submit_time_stamp(request: TimeStampBase, db: Session = Depends(get_session), token: str = Depends(JWTBearer())):
-    """Extracts emp_id from the decoded JWT token and submits a time stamp."""
+@router.post("/time-stamp/submit-time-stamp", tags=["TimeStamp"])
+async def submit_time_stamp(request: TimeStampBase, db: AsyncSession = Depends(get_async_session), claims: TokenClaims = Depends(JWTBearer())):
+    """Extracts emp_id from the verified JWT claims and submits a time stamp."""
 
-    decoded_token = decode_jwt(token)  
-
-    emp_id = decoded_token.get("emp_id") 
+    emp_id = claims.get("emp_id") 
     if not emp_id:
         raise HTTPException(status_code=400, detail="Invalid token: Missing emp_id")
 
-    return stamp_timesheet(request, emp_id, db)  
+    return await stamp_timesheet_async(request, emp_id, db)  
 
 @router.put("/time-stamp/edit-time-stamp/{stamp_id}", tags=["TimeStamp"])
-def edit_time_stamp_endpoint(stamp_id: int, stamp_data: TimeStampBase, db: Session = Depends(get_session), auth: str = Depends(JWTBearer())):
+def edit_time_stamp_endpoint(stamp_id: int, stamp_data: TimeStampBase, db: Session = Depends(get_session), auth: TokenClaims = Depends(JWTBearer())):
     return edit_time_stamp(stamp_id, stamp_data, db, auth)
 
 @router.delete("/time-stamp/delete-time-stamp/{stamp_id}", tags=["TimeStamp"])
-def delete_time_stamp_endpoint(stamp_id: int, db: Session = Depends(get_session), auth: str = Depends(JWTBearer())):
+def delete_time_stamp_endpoint(stamp_id: int, db: Session = Depends(get_session), auth: TokenClaims = Depends(JWTBearer())):
     return delete_time_stamp(stamp_id, db, auth)
 
 @router.get("/time-stamp/fetch-time-stamps", tags=["TimeStamp"])
-def fetch_time_stamps_endpoint(
-    db: Session = Depends(get_session),
-    auth: str = Depends(JWTBearer()),
+async def fetch_time_stamps_endpoint(
+    db: AsyncSession = Depends(get_async_read_session),
+    auth: TokenClaims = Depends(JWTBearer()),
     target_date: Optional[date] = None,
 ):
-    return fetch_time_stamps( db, auth, target_date)
+    return await fetch_time_stamps_async(db, auth, target_date)
 
 @router.post("/time-stamp/calculate-total-time", tags=["TimeStamp"])
 def calculate_total_time_endpoint(
     request: CalculateTotalTime,
     db: Session = Depends(get_session)
 ):
-    return calculate_total_time(request, db)
\ No newline at end of file
+    return calculate_total_time(request, db)
+
+##Search
+@router.get("/search", response_model=List[SearchResult], dependencies=[Depends(JWTBearer())], tags=["Search"])
+def search(
+    q: str = Query(..., min_length=1, max_length=100),
+    kind: Optional[List[Literal["employee", "project", "client"]]] = Query(None),
+    limit: int = Query(10, ge=1, le=SEARCH_MAX_LIMIT),
+):
+    return search_index.search(q, kinds=set(kind) if kind else None, limit=limit)
+
+##Monitoring
+@router.get("/metrics/db-pool", dependencies=[Depends(JWTBearer())], tags=["Monitoring"])
+def db_pool_metrics_endpoint():
+    return get_db_pool_status()
+
+@router.get("/metrics/token-purge", dependencies=[Depends(JWTBearer())], tags=["Monitoring"])
+def token_purge_metrics_endpoint():
+    return purge_stats
+
+@router.get("/metrics/email-outbox", dependencies=[Depends(JWTBearer())], tags=["Monitoring"])
+def email_outbox_metrics_endpoint():
+    return get_outbox_status()
+
+@router.get("/metrics/employee-cache", dependencies=[Depends(JWTBearer())], tags=["Monitoring"])
+def employee_cache_metrics_endpoint():
+    return employee_cache.stats()
+
+@router.get("/metrics/reference-cache", dependencies=[Depends(JWTBearer())], tags=["Monitoring"])
+def reference_cache_metrics_endpoint():
+    return reference_cache.stats()
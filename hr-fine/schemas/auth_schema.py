@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr
-from typing import Optional
+from typing import List, Optional
 import datetime
 
 class UserRegister(BaseModel):
@@ -25,4 +25,27 @@ class ResetPasswordRequest(BaseModel):
 
 class ChangeTempPassRequest(BaseModel):
     emp_id: str
-    new_password: str
\ No newline at end of file
+    new_password: str
+
+class BulkUserRow(BaseModel):
+    ## Plain str so one bad address is reported for its row instead of rejecting the whole batch.
+    email: str
+
+class BulkUserResult(BaseModel):
+    row: int
+    email: str
+    status: str
+    emp_id: Optional[str] = None
+    password: Optional[str] = None
+    error: Optional[str] = None
+
+class BulkRegistrationJob(BaseModel):
+    job_id: str
+    status: str
+    total: int
+    created: int = 0
+    failed: int = 0
+    results: Optional[List[BulkUserResult]] = None
+    error: Optional[str] = None
+    created_date: Optional[datetime.datetime] = None
+    finished_date: Optional[datetime.datetime] = None
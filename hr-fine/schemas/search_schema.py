@@ -0,0 +1,9 @@
+from typing import Literal
+from pydantic import BaseModel
+
+class SearchResult(BaseModel):
+    kind: Literal["employee", "project", "client"]
+    id: str
+    title: str
+    subtitle: str
+    score: float
@@ -1,6 +1,6 @@
 from datetime import date
 from pydantic import BaseModel, EmailStr
-from typing import Optional
+from typing import List, Optional
 
 class PersonalInfoBase(BaseModel):
     nation_id: str
@@ -120,6 +120,11 @@ class EmployeeDashboardInfo(BaseModel):
     class Config:
         from_attributes = True
 
+class EmployeeDashboardPage(BaseModel):
+    items: List[EmployeeDashboardInfo]
+    next_cursor: Optional[str] = None
+    total: Optional[int] = None
+
 class EmployeeDetails(BaseModel):
     emp_id: str
     email: str
@@ -231,4 +236,20 @@ class UpdateDeductionInfo(BaseModel):
     pay_SLF_IC: Optional[float] = None
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class UpdateEmployeeRecord(BaseModel):
+    personal_info: Optional[UpdatePersonalInfo] = None
+    address_info: Optional[UpdateAddressInfo] = None
+    registration_address: Optional[UpdateRegistrationAddress] = None
+    contact_info: Optional[UpdateContactInfo] = None
+    hiring_info: Optional[UpdateHiringInfo] = None
+    payment_info: Optional[UpdatePaymentInfo] = None
+    deduction_info: Optional[UpdateDeductionInfo] = None
+
+class ReportSummary(BaseModel):
+    emp_id: str
+    depth: int
+    thai_name: Optional[str] = None
+    eng_name: Optional[str] = None
+    position: Optional[str] = None
@@ -1,16 +1,25 @@
 from dotenv import load_dotenv
 from fastapi import Depends, HTTPException, Depends, status
-import jwt, os, datetime, string, random, pika, json
+import jwt, os, datetime, string, random, json, csv, io, logging, uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+from pydantic import EmailStr, TypeAdapter, ValidationError
 
-from sqlalchemy import desc
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from utils.jwt_bearer import JWTBearer
-from utils.jwt_util import create_access_token, create_refresh_token, get_hashed_password, verify_password
-
-from database.db import get_session
+from utils.jwt_bearer import JWTBearer, TokenClaims, forget_token
+from utils.event_bus import USER_REGISTERED, publish_event
+from utils.jwt_util import create_access_token, get_hashed_password, issue_session_tokens, token_digest, verify_password
+from utils.password_hasher import hash_passwords
+from utils.revocation import revoked_tokens
+from utils.search_index import index_users
+
+from database.db import SessionLocal, engine, get_session
 from models import auth_model
 from models.auth_model import RefreshToken, Users
 from schemas import auth_schema
+from services.emp_id_allocator import allocate_emp_ids
 from services.email_sending import send_reset_password_email, send_user_registration_email
 from schemas.auth_schema import ChangeTempPassRequest, ResetPasswordRequest
 
@@ -20,34 +29,17 @@ REFRESH_TOKEN_EXPIRE_MINUTES = 60 * 24 * 7
 ALGORITHM = os.getenv("ALGORITHM")
 JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY")
 JWT_REFRESH_SECRET_KEY = os.getenv("JWT_REFRESH_SECRET_KEY")
+BULK_REGISTER_MAX_ROWS = int(os.getenv("BULK_REGISTER_MAX_ROWS", 1000))
 
-def generate_username(session: Session) -> str:
-    """Generate a unique employee ID."""
-    current_year = datetime.datetime.now().year
-    thai_year = current_year + 543
-    base_id = f"{thai_year % 100}"
-    
-    last_user = (
-        session.query(auth_model.Users)
-        .filter(auth_model.Users.create_year == thai_year)
-        .order_by(desc(auth_model.Users.emp_id))
-        .first()
-    )
+email_adapter = TypeAdapter(EmailStr)
 
-    if last_user and last_user.emp_id.startswith(base_id):
-        last_id_number = int(last_user.emp_id[len(base_id):])
-        next_id_number = last_id_number + 1
-    else:
-        next_id_number = 1
+## Bulk uploads run one at a time, off the request threads; each holds at most one
+## pooled connection, and only for its short duplicate-check and insert transactions.
+_bulk_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="bulk-register")
 
-    while True:
-        emp_id = f"{base_id}{next_id_number:03d}"
-        existing_user = session.query(auth_model.Users).filter_by(emp_id=emp_id).first()
-        if not existing_user:
-            break  
-        next_id_number += 1  
-
-    return emp_id
+def generate_username(session: Session) -> str:
+    """Generate a unique employee ID."""
+    return allocate_emp_ids(session.get_bind(), count=1)[0]
 
 def generate_random_password(length: int = 12) -> str:
     characters = string.ascii_letters + string.digits
@@ -66,11 +58,6 @@ def register_user(user: auth_schema.UserRegister, session: Session=Depends(get_s
             detail="Email Already Registered.")
 
     emp_id = generate_username(session)
-    existing_emp_id = session.query(auth_model.Users).filter_by(emp_id=emp_id).first()
-    if existing_emp_id:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Employee ID {emp_id} already exists.")
 
     random_password = generate_random_password()
     encyped_password = get_hashed_password(random_password) ### NOTE: don't forget to change to random generated password when register.
@@ -84,10 +71,10 @@ def register_user(user: auth_schema.UserRegister, session: Session=Depends(get_s
     )
 
     session.add(new_user)
+    send_user_registration_email(session, to_email=user.email, emp_id=emp_id, password=random_password)
     session.commit()
     session.refresh(new_user)
-
-    send_user_registration_email(to_email=user.email, emp_id=emp_id, password=random_password)
+    publish_event(USER_REGISTERED, {"emp_id": new_user.emp_id, "email": new_user.email})
     
     return {
         "email": new_user.email,
@@ -96,14 +83,144 @@ def register_user(user: auth_schema.UserRegister, session: Session=Depends(get_s
     }
 
 
+def parse_bulk_users_csv(content: bytes) -> List[auth_schema.BulkUserRow]:
+    reader = csv.DictReader(io.StringIO(content.decode("utf-8-sig")))
+    if not reader.fieldnames or "email" not in reader.fieldnames:
+        raise HTTPException(status_code=400, detail="CSV must have an 'email' column.")
+    return [auth_schema.BulkUserRow(email=(row.get("email") or "").strip()) for row in reader]
+
+def validate_bulk_rows(rows: List[auth_schema.BulkUserRow]) -> List[auth_schema.BulkUserResult]:
+    if not rows:
+        raise HTTPException(status_code=400, detail="No users to register.")
+    if len(rows) > BULK_REGISTER_MAX_ROWS:
+        raise HTTPException(status_code=400, detail=f"At most {BULK_REGISTER_MAX_ROWS} users can be registered at once.")
+
+    results = [auth_schema.BulkUserResult(row=i, email=row.email, status="pending") for i, row in enumerate(rows, start=1)]
+
+    seen_emails = set()
+    for result in results:
+        try:
+            result.email = email_adapter.validate_python(result.email)
+        except ValidationError:
+            result.status, result.error = "error", "Invalid email address."
+            continue
+        if result.email in seen_emails:
+            result.status, result.error = "error", "Duplicate email in this upload."
+            continue
+        seen_emails.add(result.email)
+    return results
+
+def register_users_bulk(rows: List[auth_schema.BulkUserRow], session: Session) -> auth_schema.BulkRegistrationJob:
+    """
+    Validates the upload and queues it; the registration itself runs on the bulk worker
+    and its progress is read back with get_bulk_registration_job.
+    """
+    results = validate_bulk_rows(rows)
+    job = auth_model.BulkRegistrationJob(id=str(uuid.uuid4()), status="queued", total=len(results))
+    session.add(job)
+    session.commit()
+    _bulk_executor.submit(run_bulk_registration, job.id, results)
+    return get_bulk_registration_job(job.id, session)
+
+def run_bulk_registration(job_id: str, results: List[auth_schema.BulkUserResult]):
+    error = None
+    try:
+        register_bulk_results(job_id, results)
+    except Exception as e:
+        logging.exception(f"Bulk registration {job_id} failed")
+        error = str(e)[:500]
+
+    with SessionLocal() as session:
+        job = session.get(auth_model.BulkRegistrationJob, job_id)
+        job.status = "failed" if error else "done"
+        job.error = error
+        job.created = sum(result.status == "created" for result in results)
+        job.failed = len(results) - job.created
+        job.results = json.dumps([result.model_dump(exclude={"password"}) for result in results])
+        job.finished_date = datetime.datetime.now()
+        session.commit()
+
+def register_bulk_results(job_id: str, results: List[auth_schema.BulkUserResult]):
+    """
+    Registers the validated rows. bcrypt runs with no connection checked out: the
+    duplicate check and the insert are each their own short transaction.
+    """
+    emails = [result.email for result in results if result.status == "pending"]
+    with SessionLocal() as session:
+        session.get(auth_model.BulkRegistrationJob, job_id).status = "running"
+        existing_emails = {
+            email for email, in session.query(Users.email).filter(Users.email.in_(emails)).all()
+        } if emails else set()
+        session.commit()
+
+    accepted = []
+    for result in results:
+        if result.status != "pending":
+            continue
+        if result.email in existing_emails:
+            result.status, result.error = "error", "Email Already Registered."
+        else:
+            accepted.append(result)
+    if not accepted:
+        return
+
+    passwords = [generate_random_password() for _ in accepted]
+    hashed_passwords = hash_passwords(passwords)
+    emp_ids = allocate_emp_ids(engine, count=len(accepted))
+    create_year = datetime.datetime.now().year
+
+    rows = [
+        {"emp_id": emp_id, "email": result.email, "password": hashed, "create_year": create_year, "reset_status": False}
+        for result, emp_id, hashed in zip(accepted, emp_ids, hashed_passwords)
+    ]
+    created = []
+    with SessionLocal() as session:
+        try:
+            with session.begin_nested():
+                session.execute(insert(Users), rows)
+            created = list(zip(accepted, emp_ids, passwords))
+        except IntegrityError:
+            ## an email was registered while we were hashing; retry row by row so only that row fails
+            for result, emp_id, password, row in zip(accepted, emp_ids, passwords, rows):
+                try:
+                    with session.begin_nested():
+                        session.execute(insert(Users), [row])
+                    created.append((result, emp_id, password))
+                except IntegrityError:
+                    result.status, result.error = "error", "Email registered during this upload; please resubmit."
+        for result, emp_id, password in created:
+            send_user_registration_email(session, to_email=result.email, emp_id=emp_id, password=password)
+        session.commit()
+
+    for result, emp_id, _ in created:
+        result.status, result.emp_id = "created", emp_id
+        publish_event(USER_REGISTERED, {"emp_id": emp_id, "email": result.email})
+    index_users((emp_id, result.email) for result, emp_id, _ in created)
+
+def get_bulk_registration_job(job_id: str, session: Session) -> auth_schema.BulkRegistrationJob:
+    job = session.get(auth_model.BulkRegistrationJob, job_id, populate_existing=True)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Bulk registration job '{job_id}' not found.")
+    return auth_schema.BulkRegistrationJob(
+        job_id=job.id,
+        status=job.status,
+        total=job.total,
+        created=job.created or 0,
+        failed=job.failed or 0,
+        results=json.loads(job.results) if job.results else None,
+        error=job.error,
+        created_date=job.created_date,
+        finished_date=job.finished_date,
+    )
+
 def login_user(request: auth_schema.UserLogin, db: Session=Depends(get_session)):
-    user = db.query(Users).filter(Users.emp_id == request.emp_id).first()
-    
     if not request.emp_id or not request.password:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Username and Password cannot be Empty."
         )
+
+    user = db.query(Users).filter(Users.emp_id == request.emp_id).first()
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -115,47 +232,27 @@ def login_user(request: auth_schema.UserLogin, db: Session=Depends(get_session))
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Incorrect Password."
         )
-    
-    access = create_access_token(user.id, emp_id=user.emp_id, db=db)
-    refresh = create_refresh_token(user.id, emp_id=user.emp_id, db=db)
 
-    token_db = auth_model.RefreshToken(user_id=user.id, access_token=access, refresh_token=refresh, status=True)
-    db.add(token_db)
-    db.commit()
-    db.refresh(token_db)
+    return issue_session_tokens(user, db)
 
-    return {
-        "access_token": access,
-        "refresh_token": refresh
-    }
+def logout_user(dependencies: TokenClaims = Depends(JWTBearer()), db:Session=Depends(get_session)):
+    claims = dependencies
+    token = claims.token
+    forget_token(token)
 
-def logout_user(dependencies=Depends(JWTBearer()), db:Session=Depends(get_session)):
-    token = dependencies
-    try: 
-        payload = jwt.decode(token, JWT_SECRET_KEY, ALGORITHM)
-    except jwt.ExpiredSignatureError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Token has Expired."
-        )
-    except jwt.InvalidTokenError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid Token."
-        )
-    
-    user_id = payload['sub']
-    token_record = (db.query(RefreshToken)
-                    .filter(
-                        RefreshToken.user_id == user_id,
-                        RefreshToken.access_token == token,
-                    ).first())
+    user_id = claims['sub']
+    session_id = claims.get("sid")
+    ## tokens minted before session ids existed are found by their digest
+    session_filter = RefreshToken.session_id == session_id if session_id else RefreshToken.access_token_digest == token_digest(token)
+    token_record = db.query(RefreshToken).filter(RefreshToken.user_id == user_id, session_filter).first()
 
     if token_record:
         token_record.status = False
-        db.add(token_record)
+        token_record.revoked_date = datetime.datetime.now()
         db.commit()
-        db.refresh(token_record)
+    revoked_tokens.add(token_digest(token))
+    if session_id:
+        revoked_tokens.add(session_id)
 
     return {"message": "LogOut Successfully."}
 
@@ -206,10 +303,10 @@ def reset_password(request: ResetPasswordRequest, db: Session = Depends(get_sess
     user.password = hashed_password
     user.reset_status = False
     db.add(user)
+    send_reset_password_email(db, user.email, new_password)
     db.commit()
     db.refresh(user)
 
-    send_reset_password_email(user.email, new_password)
     return {"message": "Password has been reset. Please check your email for the new password."}
 
 
@@ -226,15 +323,19 @@ def access_refresh_token(refresh_token: str, db: Session = Depends(get_session))
         db.query(RefreshToken)
         .filter(
             RefreshToken.user_id == user_id,
-            RefreshToken.refresh_token == refresh_token,
+            RefreshToken.refresh_token_digest == token_digest(refresh_token),
             RefreshToken.status == True,
         ).first()
     ) 
     if not token_record:
         raise HTTPException(status_code=401, detail= "Refresh Token is Invalid or Revoked.")
     
-    new_access_token = create_access_token(user_id)
+    new_access_token = create_access_token(user_id, emp_id=payload["emp_id"], db=db, session_id=token_record.session_id)
     token_record.access_token = new_access_token
-    db.add(token_record)
-    db.commit
-    db.refresh(token_record)
\ No newline at end of file
+    token_record.access_token_digest = token_digest(new_access_token)
+    db.commit()
+
+    return {
+        "access_token": new_access_token,
+        "refresh_token": refresh_token
+    }
\ No newline at end of file
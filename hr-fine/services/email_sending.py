@@ -1,6 +1,16 @@
-from utils.email_util import send_email
+from sqlalchemy.orm import Session
+from models.email_model import EmailOutbox
 
-def send_user_registration_email(to_email: str, emp_id: str, password: str):
+def queue_email(db: Session, to_email: str, subject: str, body: str) -> EmailOutbox:
+    """
+    Adds the mail to the outbox in the caller's transaction; utils/email_outbox.py
+    delivers it after commit, so a rolled-back change never sends mail.
+    """
+    email = EmailOutbox(to_email=to_email, subject=subject, body=body, status="pending", attempts=0)
+    db.add(email)
+    return email
+
+def send_user_registration_email(db: Session, to_email: str, emp_id: str, password: str):
     subject = "Welcome to the Company"
     body = (
         f"Dear User, \n\n"
@@ -10,9 +20,9 @@ def send_user_registration_email(to_email: str, emp_id: str, password: str):
         f"Please Log in and change your password at your earliest convenience. \n\n"
         f"Best Regard, \nCompany Team"
     ) 
-    send_email(to_email=to_email, subject=subject, body=body)
+    return queue_email(db, to_email=to_email, subject=subject, body=body)
 
-def send_reset_password_email(to_email: str, new_password: str):
+def send_reset_password_email(db: Session, to_email: str, new_password: str):
     """
     Sends an email when a user resets their password.
     """
@@ -26,4 +36,4 @@ def send_reset_password_email(to_email: str, new_password: str):
         f"Best Regards,\nCompany Team"
     ) 
 
-    send_email(to_email=to_email, subject=subject, body=body)
\ No newline at end of file
+    return queue_email(db, to_email=to_email, subject=subject, body=body)
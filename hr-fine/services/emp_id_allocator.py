@@ -0,0 +1,62 @@
+import datetime
+from typing import List
+from sqlalchemy import Integer, cast, func, select
+from sqlalchemy.dialects.mysql import insert
+from sqlalchemy.engine import Engine
+
+from models.auth_model import EmpIdSequence, Users
+
+## Years whose sequence row this process already knows exists.
+_seeded_years = set()
+
+def current_thai_year() -> int:
+    return datetime.datetime.now().year + 543
+
+def format_emp_id(thai_year: int, number: int) -> str:
+    return f"{thai_year % 100}{number:03d}"
+
+def _seed_sequence(connection, thai_year: int):
+    """Creates the year's row, continuing after any IDs issued before the sequence table existed."""
+    prefix = f"{thai_year % 100}"
+    highest_existing = (
+        select(func.coalesce(func.max(cast(func.substring(Users.emp_id, len(prefix) + 1), Integer)), 0))
+        .where(Users.emp_id.like(f"{prefix}%"))
+        .scalar_subquery()
+    )
+    connection.execute(
+        insert(EmpIdSequence)
+        .prefix_with("IGNORE")
+        .values(year=thai_year, last_number=highest_existing)
+    )
+
+def allocate_emp_ids(engine: Engine, count: int = 1, thai_year: int = None) -> List[str]:
+    """
+    Reserves `count` consecutive employee IDs for the year with one atomic upsert.
+
+    Runs in its own short autocommitted transaction so the sequence row lock is not held
+    while the caller hashes passwords or sends mail. IDs from a registration that later
+    fails are simply skipped, like any database sequence.
+    """
+    if count < 1:
+        raise ValueError("count must be at least 1")
+    thai_year = thai_year or current_thai_year()
+
+    with engine.begin() as connection:
+        if thai_year not in _seeded_years:
+            _seed_sequence(connection, thai_year)
+            _seeded_years.add(thai_year)
+
+        ## LAST_INSERT_ID(expr) makes the new value readable on this connection without a second lookup of the row.
+        upsert = insert(EmpIdSequence).values(
+            year=thai_year,
+            last_number=func.last_insert_id(count),
+        )
+        connection.execute(
+            upsert.on_duplicate_key_update(
+                last_number=func.last_insert_id(EmpIdSequence.last_number + count)
+            )
+        )
+        last_value = connection.execute(select(func.last_insert_id())).scalar_one()
+
+    first_value = last_value - count + 1
+    return [format_emp_id(thai_year, number) for number in range(first_value, last_value + 1)]
@@ -0,0 +1,78 @@
+import csv, io, json
+from datetime import date, datetime
+from typing import Dict, Iterator, List, Optional
+from fastapi import HTTPException
+from sqlalchemy import select
+
+from database.db import ReadSessionLocal
+from models.auth_model import Users
+from models.user_model import AddressInfo, DeductionInfo, HiringInfo, PaymentInfo, PersonalInfo
+
+EXPORT_BATCH_SIZE = 500
+EXPORT_SECTIONS = {
+    "personal_info": PersonalInfo,
+    "address_info": AddressInfo,
+    "hiring_info": HiringInfo,
+    "payment_info": PaymentInfo,
+    "deduction_info": DeductionInfo,
+}
+
+def build_export_columns() -> Dict[str, tuple]:
+    """Maps each exportable column name ("emp_id", "hiring_info.start_date", ...) to (section, column)."""
+    columns = {"emp_id": (None, Users.emp_id), "email": (None, Users.email)}
+    for section, model in EXPORT_SECTIONS.items():
+        for column in model.__table__.columns:
+            if column.name not in ("id", "emp_id"):
+                columns[f"{section}.{column.name}"] = (section, getattr(model, column.key))
+    return columns
+
+EXPORT_COLUMNS = build_export_columns()
+
+def resolve_export_columns(columns: Optional[str]) -> List[str]:
+    if not columns:
+        return list(EXPORT_COLUMNS)
+    names = [name.strip() for name in columns.split(",") if name.strip()]
+    unknown = [name for name in names if name not in EXPORT_COLUMNS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown export columns: {', '.join(unknown)}")
+    return list(dict.fromkeys(names))
+
+def employee_export_query(names: List[str]):
+    sections = {EXPORT_COLUMNS[name][0] for name in names} - {None}
+    query = select(*(EXPORT_COLUMNS[name][1].label(name) for name in names)).select_from(Users)
+    for section, model in EXPORT_SECTIONS.items():
+        if section in sections:
+            query = query.outerjoin(model, model.emp_id == Users.emp_id)
+    return query.order_by(Users.id)
+
+def export_value(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+def stream_employee_export(names: List[str], export_format: str) -> Iterator[str]:
+    """
+    Yields the export one batch at a time. Rows come off a server-side cursor
+    (`yield_per`), so memory use does not grow with the number of employees.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if export_format == "csv" else None
+    if writer:
+        writer.writerow(names)
+
+    with ReadSessionLocal() as session:
+        result = session.execute(employee_export_query(names).execution_options(yield_per=EXPORT_BATCH_SIZE))
+        for rows in result.partitions():
+            for row in rows:
+                values = [export_value(value) for value in row]
+                if writer:
+                    writer.writerow(values)
+                else:
+                    buffer.write(json.dumps(dict(zip(names, values)), ensure_ascii=False, default=str))
+                    buffer.write("\n")
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue()
@@ -0,0 +1,132 @@
+"""
+Headcount aggregate over the HiringInfo dimensions.
+
+Every HiringInfo insert, update and delete applies a +1/-1 delta to its dimension
+combination from mapper events, on the flush's own connection, so the aggregate
+commits or rolls back with the change itself. Breakdowns by any subset of dimensions
+are a GROUP BY over this small table.
+
+    python -m services.headcount_service rebuild   # recompute from hiring_info
+    python -m services.headcount_service check     # compare with a full recompute
+"""
+import sys
+from collections import Counter
+from typing import Dict, List, Tuple
+from sqlalchemy import delete, event, func, inspect, insert, select, update
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.orm import Session
+
+from database.db import SessionLocal
+from models.user_model import Department, Headcount, HiringInfo, Position
+
+HEADCOUNT_DIMENSIONS = ("department", "position", "working_location", "emp_type", "working_status")
+
+def _dimension_key(values) -> Tuple:
+    return tuple(values[dimension] for dimension in HEADCOUNT_DIMENSIONS)
+
+def _apply_delta(connection, key: Tuple, delta: int):
+    values = dict(zip(HEADCOUNT_DIMENSIONS, key))
+    if connection.dialect.name == "mysql":
+        connection.execute(
+            mysql_insert(Headcount)
+            .values(**values, headcount=delta)
+            .on_duplicate_key_update(headcount=Headcount.headcount + delta)
+        )
+        return
+    updated = connection.execute(
+        update(Headcount)
+        .where(*(getattr(Headcount, dimension) == value for dimension, value in values.items()))
+        .values(headcount=Headcount.headcount + delta)
+    )
+    if updated.rowcount == 0:
+        connection.execute(insert(Headcount).values(**values, headcount=delta))
+
+def _current_key(target: HiringInfo) -> Tuple:
+    return tuple(getattr(target, dimension) for dimension in HEADCOUNT_DIMENSIONS)
+
+def _previous_key(target: HiringInfo) -> Tuple:
+    state = inspect(target)
+    previous = []
+    for dimension in HEADCOUNT_DIMENSIONS:
+        history = state.attrs[dimension].history
+        previous.append(history.deleted[0] if history.deleted else getattr(target, dimension))
+    return tuple(previous)
+
+@event.listens_for(HiringInfo, "after_insert")
+def _count_hire(mapper, connection, target):
+    _apply_delta(connection, _current_key(target), 1)
+
+@event.listens_for(HiringInfo, "after_update")
+def _move_headcount(mapper, connection, target):
+    previous, current = _previous_key(target), _current_key(target)
+    if previous != current:
+        _apply_delta(connection, previous, -1)
+        _apply_delta(connection, current, 1)
+
+@event.listens_for(HiringInfo, "after_delete")
+def _uncount_hire(mapper, connection, target):
+    _apply_delta(connection, _previous_key(target), -1)
+
+def recompute_headcount(db: Session) -> Counter:
+    columns = [getattr(HiringInfo, dimension) for dimension in HEADCOUNT_DIMENSIONS]
+    return Counter({tuple(row[:-1]): row[-1] for row in db.execute(select(*columns, func.count()).group_by(*columns))})
+
+def stored_headcount(db: Session) -> Counter:
+    columns = [getattr(Headcount, dimension) for dimension in HEADCOUNT_DIMENSIONS]
+    rows = db.execute(select(*columns, Headcount.headcount).where(Headcount.headcount != 0))
+    return Counter({tuple(row[:-1]): row[-1] for row in rows})
+
+def rebuild_headcount(db: Session) -> int:
+    counts = recompute_headcount(db)
+    db.execute(delete(Headcount))
+    if counts:
+        db.execute(
+            insert(Headcount),
+            [dict(zip(HEADCOUNT_DIMENSIONS, key), headcount=count) for key, count in counts.items()],
+        )
+    db.commit()
+    return len(counts)
+
+def headcount_drift(db: Session) -> Dict[Tuple, Tuple[int, int]]:
+    """Combinations where the aggregate disagrees with hiring_info, as key -> (stored, actual)."""
+    stored, actual = stored_headcount(db), recompute_headcount(db)
+    return {key: (stored[key], actual[key]) for key in stored.keys() | actual.keys() if stored[key] != actual[key]}
+
+def ensure_headcount():
+    """Builds the aggregate on first start after deployment; afterwards it is maintained by deltas."""
+    with SessionLocal() as db:
+        if db.execute(select(Headcount.id).limit(1)).first() is None:
+            rebuild_headcount(db)
+
+def get_headcount(db: Session, group_by: List[str]) -> dict:
+    columns = [getattr(Headcount, dimension) for dimension in group_by]
+    query = select(*columns, func.sum(Headcount.headcount).label("headcount")).where(Headcount.headcount > 0)
+    if "department" in group_by:
+        query = query.add_columns(Department.department.label("department_name")).outerjoin(Department, Department.id == Headcount.department)
+        columns.append(Department.department)
+    if "position" in group_by:
+        query = query.add_columns(Position.position.label("position_name")).outerjoin(Position, Position.id == Headcount.position)
+        columns.append(Position.position)
+    if columns:
+        query = query.group_by(*columns).order_by(func.sum(Headcount.headcount).desc())
+
+    groups = [dict(row._mapping) for row in db.execute(query)]
+    for group in groups:
+        group["headcount"] = int(group["headcount"] or 0)
+    return {
+        "group_by": group_by,
+        "total": sum(group["headcount"] for group in groups),
+        "groups": groups if group_by else [],
+    }
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "check"
+    with SessionLocal() as session:
+        if command == "rebuild":
+            print(f"Rebuilt headcount: {rebuild_headcount(session)} combinations")
+        else:
+            drift = headcount_drift(session)
+            for key, (stored, actual) in sorted(drift.items(), key=str):
+                print(f"DRIFT {dict(zip(HEADCOUNT_DIMENSIONS, key))}: stored {stored}, actual {actual}")
+            print("headcount matches hiring_info" if not drift else f"{len(drift)} combinations drifted")
+            sys.exit(1 if drift else 0)
@@ -1,5 +1,6 @@
 from fastapi import HTTPException, Depends
-from typing import Any, Dict, List
+from functools import wraps
+from typing import Any, Callable, Dict, List
 from sqlalchemy.orm import Session, joinedload
 from schemas.optional_schema import (
     AddCompany, AddEmployeeType, AddContractType, AddDepartment, AddPosition, AddWorkingStatus, FetchDepartment, FetchPosition
@@ -7,7 +8,29 @@ from schemas.optional_schema import (
 from schemas.optional_schema import AddProjectType
 from models.project_model import ProjectType
 from models.user_model import Company, EmployeeType, ContractType, Department, Position, WorkingStatus
-from database.db import get_session
+from database.db import SessionLocal, get_session
+from utils.reference_cache import reference_cache
+
+## name -> uncached loader, in the order they appear in the /optional/all bundle
+REFERENCE_LOOKUPS: Dict[str, Callable] = {}
+
+def load_from_primary(loader: Callable):
+    """Cache fills read the primary: a value loaded from a lagging replica would be served for the whole TTL."""
+    with SessionLocal() as db:
+        return loader(db)
+
+def reference_data(name: str):
+    """
+    Serves the decorated lookup from `reference_cache`; writers invalidate it by `name`.
+    The wrapper takes no session, so a cache hit checks out no connection.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper():
+            return reference_cache.get(name, lambda: load_from_primary(func))
+        REFERENCE_LOOKUPS[name] = func
+        return wrapper
+    return decorator
 
 def update_model_data(model, data: Dict):
     for key, value in data.items():
@@ -24,6 +47,7 @@ def add_company(request: AddCompany, db: Session=Depends(get_session)):
     db.add(new_company)
     db.commit()
     db.refresh(new_company)
+    reference_cache.invalidate("companies")
     return{
         "company": new_company
     }
@@ -40,6 +64,7 @@ def add_employee_type(request: AddEmployeeType, db: Session=Depends(get_session)
     db.add(new_employee_type)
     db.commit()
     db.refresh(new_employee_type)
+    reference_cache.invalidate("employee_types")
     return{
         "employee_type": new_employee_type
     }
@@ -56,6 +81,7 @@ def add_contract_type(request: AddContractType, db: Session=Depends(get_session)
     db.add(new_contract_type)
     db.commit()
     db.refresh(new_contract_type)
+    reference_cache.invalidate("contract_types")
     return{
         "contract_type": new_contract_type
     }
@@ -72,6 +98,7 @@ def add_department(request: AddDepartment, db: Session=Depends(get_session)):
     db.add(new_department)
     db.commit()
     db.refresh(new_department)
+    reference_cache.invalidate("departments")
     return{
         "id": new_department.id,
         "department": new_department
@@ -94,6 +121,7 @@ def add_position(request: AddPosition, db: Session=Depends(get_session)):
     db.add(new_position)
     db.commit()
     db.refresh(new_position)
+    reference_cache.invalidate("positions", "departments")
 
     return {
         "id": new_position.id,
@@ -113,6 +141,7 @@ def add_working_status(request: AddWorkingStatus, db: Session=Depends(get_sessio
     db.add(new_working_status)
     db.commit()
     db.refresh(new_working_status)
+    reference_cache.invalidate("working_status")
 
     return{
         "working_status": new_working_status
@@ -135,6 +164,7 @@ def edit_position(request: AddPosition, db: Session = Depends(get_session)):
     position.department_id = request.department_id
     db.commit()
     db.refresh(position)
+    reference_cache.invalidate("positions", "departments")
 
     return {
         "id": position.id,
@@ -150,27 +180,33 @@ def create_project_type(request: AddProjectType, db: Session=Depends(get_session
     db.add(new_project_types)
     db.commit()
     db.refresh(new_project_types)
+    reference_cache.invalidate("project_types")
 
     return {
         "project_types": new_project_types,
     }
 
+@reference_data("project_types")
 def response_project_type(db: Session = Depends(get_session)):
     project_types = db.query(ProjectType).all()
     return [{"id": project_type.id, "project_types": project_type.project_types } for project_type in project_types]
 
+@reference_data("companies")
 def fetch_company(db: Session = Depends(get_session)):
     companies = db.query(Company).all()
     return[{"id": company.id, "company": company.company} for company in companies]
 
+@reference_data("employee_types")
 def fetch_emp_type(db: Session = Depends(get_session)):
     employee_types = db.query(EmployeeType).all()
     return [{"id": emp_type.id, "employee_type": emp_type.employee_type } for emp_type in employee_types]
 
+@reference_data("contract_types")
 def fetch_contract(db: Session = Depends(get_session)):
     contrac_types = db.query(ContractType).all()
     return [{"id": contract_type.id, "contract_type": contract_type.contract_type} for contract_type in contrac_types] 
 
+@reference_data("departments")
 def fetch_department(db: Session = Depends(get_session)):
     departments = db.query(Department).options(joinedload(Department.positions)).all()
 
@@ -189,10 +225,16 @@ def fetch_department(db: Session = Depends(get_session)):
         )
     return department_list
 
+@reference_data("positions")
 def fetch_positions(db: Session = Depends(get_session)) -> List[FetchPosition]:
     positions = db.query(Position).all()
     return [FetchPosition.model_validate(position) for position in positions]
 
+@reference_data("working_status")
 def fetch_working_status(db: Session = Depends(get_session)):
     worked_status = db.query(WorkingStatus).all()
-    return [{"id": working_status.id, "working_status": working_status.working_status} for working_status in worked_status]
\ No newline at end of file
+    return [{"id": working_status.id, "working_status": working_status.working_status} for working_status in worked_status]
+
+def fetch_all_reference_data():
+    """Every /optional/* lookup as one JSON document and its ETag."""
+    return reference_cache.bundle({name: (lambda loader=loader: load_from_primary(loader)) for name, loader in REFERENCE_LOOKUPS.items()})
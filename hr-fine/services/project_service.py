@@ -1,6 +1,8 @@
 from typing import Any, Dict, List
 from fastapi import HTTPException, Depends
-from database.db import get_session
+from database.db import get_async_session, get_session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy.orm.exc import NoResultFound
 from pydantic import TypeAdapter
@@ -15,7 +17,8 @@ from services.user_service import update_model_data
 from schemas.project_schema import FetchProjectMember, GenerateProjectCode, PlanEdit, ProjectAllDetails, ProjectAssigned, ProjectBillBase, ProjectDetailEdit, ProjectDetailsBase, ProjectDurationBase, ProjectDurationEdit, ProjectMemberBase, ProjectMemberEdit, ProjectPlanBase, SubmitallProjectData, ProjectDashboardinfo
 from schemas.optional_schema import AddProjectType
 
-from utils.jwt_bearer import JWTBearer, decode_jwt
+from utils.event_bus import PROJECT_MEMBER_CHANGED, publish_event
+from utils.jwt_bearer import JWTBearer, TokenClaims
 
 from constants import EMP_ID_NOT_EXIST
 
@@ -87,6 +90,14 @@ def create_project_bill(db:Session, project_id: int, project_bill_data: dict):
     db.refresh(db_project_bill)
     return(db_project_bill)
 
+def project_member_event(action: str, project_member: ProjectMember) -> dict:
+    return {
+        "action": action,
+        "project_member_id": project_member.project_member_id,
+        "project_id": project_member.project_id,
+        "member_id": project_member.member_id,
+    }
+
 def create_project_member(db: Session, project_id: int, project_member_data: dict):
 
     member_id = project_member_data.get("member_id")
@@ -107,6 +118,7 @@ def create_project_member(db: Session, project_id: int, project_member_data: dic
     db.add(db_project_member)
     db.commit()
     db.refresh(db_project_member)
+    publish_event(PROJECT_MEMBER_CHANGED, project_member_event("added", db_project_member))
     
     return db_project_member
 
@@ -319,24 +331,16 @@ def fetch_managers(db: Session = Depends(get_session)):
         for manager in managers
     ]
 
-def get_project_assigned(
-        db: Session = Depends(get_session), 
-        auth: str = Depends(JWTBearer()),
-    ):
-    
-    emp_id = decode_jwt(auth).get("emp_id")
-    if not emp_id: 
-        raise HTTPException(status_code=401, detail=EMP_ID_NOT_EXIST)
-
-    projects = (
-        db.query(ProjectDetails)
+def project_assigned_query(emp_id: str):
+    return (
+        select(ProjectDetails)
         .join(ProjectMember, ProjectDetails.project_id == ProjectMember.project_id) 
         .filter(ProjectMember.member_id == emp_id)  
         .options(joinedload(ProjectDetails.project_plan))  
         .order_by(ProjectDetails.project_code)
-        .all()
     )
 
+def build_project_assigned(projects) -> List[ProjectAssigned]:
     return [
         ProjectAssigned(
             project_name=project.project_name,
@@ -357,6 +361,18 @@ def get_project_assigned(
         for project in projects
     ]
 
+async def get_project_assigned_async(
+        db: AsyncSession = Depends(get_async_session),
+        auth: TokenClaims = Depends(JWTBearer()),
+    ):
+
+    emp_id = auth.get("emp_id")
+    if not emp_id: 
+        raise HTTPException(status_code=401, detail=EMP_ID_NOT_EXIST)
+
+    result = await db.execute(project_assigned_query(emp_id))
+    return build_project_assigned(result.unique().scalars().all())
+
 def update_project_details(
         project_id: int, 
         project_data: ProjectDetailEdit,
@@ -498,6 +514,7 @@ def update_member(
         update_model_data(project_member, project_data.project_member.model_dump(exclude_unset=True))
         db.commit()
         db.refresh(project_member)
+        publish_event(PROJECT_MEMBER_CHANGED, project_member_event("updated", project_member))
 
         return {"message": "Project member updated successfully", "data": project_member}
 
@@ -516,9 +533,11 @@ def delete_project_member(
         raise HTTPException(status_code=404, detail=f"Project member with project_member_id '{project_member_id}' not found.")
      
     try:
+        removed = project_member_event("removed", project_member)
         db.delete(project_member)
         db.commit()
         db.expire_all()
+        publish_event(PROJECT_MEMBER_CHANGED, removed)
         return {"status": "success", "message": "Project member '{project_member_id}' deleted successfully."}
 
     except Exception as e :
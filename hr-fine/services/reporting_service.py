@@ -0,0 +1,132 @@
+"""
+Reporting lines as a closure table over HiringInfo.manager.
+
+`move_reporting_line` re-parents an employee (with everyone under them) inside the
+caller's transaction; `rebuild_reporting_lines` recomputes the whole table:
+
+    python -m services.reporting_service
+"""
+import logging
+from typing import List, Optional
+from fastapi import HTTPException
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from database.db import SessionLocal
+from models.user_model import HiringInfo, PersonalInfo, Position, ReportingLine
+from schemas.user_schema import ReportSummary
+
+REBUILD_BATCH_SIZE = 1000
+
+def move_reporting_line(db: Session, emp_id: str, manager: Optional[str]):
+    """Puts `emp_id`'s subtree under `manager` (None detaches it). Does not commit."""
+    manager = (manager or "").strip() or None
+
+    current = db.execute(
+        select(ReportingLine.ancestor).where(ReportingLine.descendant == emp_id, ReportingLine.depth == 1)
+    ).scalar()
+    subtree = db.execute(
+        select(ReportingLine.descendant, ReportingLine.depth).where(ReportingLine.ancestor == emp_id)
+    ).all()
+    if subtree and current == manager:
+        return
+
+    rows = []
+    if not subtree:
+        subtree = [(emp_id, 0)]
+        rows.append({"ancestor": emp_id, "descendant": emp_id, "depth": 0})
+    subtree_ids = [descendant for descendant, _ in subtree]
+
+    if manager in subtree_ids:
+        raise HTTPException(status_code=400, detail=f"Manager '{manager}' reports to '{emp_id}'; this would create a reporting cycle.")
+
+    db.execute(
+        delete(ReportingLine).where(
+            ReportingLine.descendant.in_(subtree_ids),
+            ReportingLine.ancestor.not_in(subtree_ids),
+        )
+    )
+
+    if manager:
+        ancestors = db.execute(
+            select(ReportingLine.ancestor, ReportingLine.depth).where(ReportingLine.descendant == manager)
+        ).all()
+        if not ancestors:
+            ancestors = [(manager, 0)]
+            rows.append({"ancestor": manager, "descendant": manager, "depth": 0})
+        rows.extend(
+            {"ancestor": ancestor, "descendant": descendant, "depth": up + down + 1}
+            for ancestor, up in ancestors
+            for descendant, down in subtree
+        )
+
+    if rows:
+        db.execute(insert(ReportingLine), rows)
+
+def rebuild_reporting_lines(db: Session) -> int:
+    managers = {emp_id: (manager or "").strip() for emp_id, manager in db.execute(select(HiringInfo.emp_id, HiringInfo.manager))}
+
+    rows = []
+    for emp_id in set(managers) | {manager for manager in managers.values() if manager}:
+        rows.append({"ancestor": emp_id, "descendant": emp_id, "depth": 0})
+        seen, node, depth = {emp_id}, emp_id, 0
+        while managers.get(node):
+            node, depth = managers[node], depth + 1
+            if node in seen:
+                logging.warning(f"Reporting cycle through '{node}'; stopping the walk from '{emp_id}'")
+                break
+            seen.add(node)
+            rows.append({"ancestor": node, "descendant": emp_id, "depth": depth})
+
+    db.execute(delete(ReportingLine))
+    for start in range(0, len(rows), REBUILD_BATCH_SIZE):
+        db.execute(insert(ReportingLine), rows[start:start + REBUILD_BATCH_SIZE])
+    db.commit()
+    return len(rows)
+
+def ensure_reporting_lines():
+    """Builds the table on first start after deployment; afterwards it is maintained incrementally."""
+    with SessionLocal() as db:
+        if db.execute(select(func.count()).select_from(ReportingLine)).scalar_one():
+            return
+        if db.execute(select(HiringInfo.id).limit(1)).first() is None:
+            return
+        logging.info(f"Built reporting lines: {rebuild_reporting_lines(db)} rows")
+
+def reports_query(emp_id: str, transitive: bool = False, max_depth: Optional[int] = None):
+    query = (
+        select(
+            ReportingLine.descendant.label("emp_id"),
+            ReportingLine.depth,
+            PersonalInfo.thai_name,
+            PersonalInfo.eng_name,
+            Position.position.label("position_name"),
+        )
+        .outerjoin(PersonalInfo, PersonalInfo.emp_id == ReportingLine.descendant)
+        .outerjoin(HiringInfo, HiringInfo.emp_id == ReportingLine.descendant)
+        .outerjoin(Position, Position.id == HiringInfo.position)
+        .where(ReportingLine.ancestor == emp_id)
+    )
+    if not transitive:
+        query = query.where(ReportingLine.depth == 1)
+    else:
+        query = query.where(ReportingLine.depth >= 1)
+        if max_depth is not None:
+            query = query.where(ReportingLine.depth <= max_depth)
+    return query.order_by(ReportingLine.depth, ReportingLine.descendant)
+
+def get_reports(db: Session, emp_id: str, transitive: bool = False, max_depth: Optional[int] = None) -> List[ReportSummary]:
+    return [
+        ReportSummary(
+            emp_id=row.emp_id,
+            depth=row.depth,
+            thai_name=row.thai_name,
+            eng_name=row.eng_name,
+            position=row.position_name,
+        )
+        for row in db.execute(reports_query(emp_id, transitive, max_depth))
+    ]
+
+if __name__ == "__main__":
+    with SessionLocal() as session:
+        print(f"Rebuilt reporting lines: {rebuild_reporting_lines(session)} rows")
@@ -2,13 +2,16 @@ import datetime
 from datetime import date, datetime, time, timedelta
 from typing import Optional
 from fastapi import HTTPException, Depends
-from database.db import get_session
+from database.db import get_async_session, get_session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, joinedload
 
 from schemas.timesheet_schemas import CalculateTotalTime, TimeStampBase, TimeStampResponseSchema, TimeStampSchema, WeekRangeSchema
 from models.timesheet_model import TimeStamp
 
-from utils.jwt_bearer import JWTBearer, decode_jwt
+from utils.event_bus import TIMESTAMP_EDITED, TIMESTAMP_SUBMITTED, publish_event
+from utils.jwt_bearer import JWTBearer, TokenClaims
 
 from constants import EMP_ID_NOT_EXIST
 
@@ -26,7 +29,8 @@ def calculate_total_time(request: CalculateTotalTime):
 
     return {"total_time": f"{hours:02}:{minutes:02}"}
 
-def stamp_timesheet(stamp_data: TimeStampBase, emp_id: str, db: Session = Depends(get_session)):
+def build_time_stamp(stamp_data: TimeStampBase, emp_id: str) -> TimeStamp:
+    """Validates a submitted stamp and builds the (unsaved) TimeStamp row."""
 
     today = datetime.today().date()
     start_of_current_week = today - timedelta(days=today.weekday()) 
@@ -77,7 +81,7 @@ def stamp_timesheet(stamp_data: TimeStampBase, emp_id: str, db: Session = Depend
     )
     total_time = total_time_data["total_time"]
 
-    new_stamp = TimeStamp(
+    return TimeStamp(
         emp_id=emp_id,
         project_id=stamp_data.project_id,
         period_id= stamp_data.period_id,
@@ -91,18 +95,30 @@ def stamp_timesheet(stamp_data: TimeStampBase, emp_id: str, db: Session = Depend
         travel_expenses=stamp_data.travel_expenses,
     )
 
+def time_stamp_event(time_stamp: TimeStamp) -> dict:
+    return {
+        "stamp_id": time_stamp.stamp_id,
+        "emp_id": time_stamp.emp_id,
+        "project_id": time_stamp.project_id,
+        "stamp_date": time_stamp.stamp_date,
+        "total_time": time_stamp.total_time,
+    }
+
+async def stamp_timesheet_async(stamp_data: TimeStampBase, emp_id: str, db: AsyncSession = Depends(get_async_session)):
+    new_stamp = build_time_stamp(stamp_data, emp_id)
+
     db.add(new_stamp)
-    db.commit()
-    db.refresh(new_stamp)
-    
+    await db.commit()
+    await db.refresh(new_stamp)
+    publish_event(TIMESTAMP_SUBMITTED, time_stamp_event(new_stamp))
+
     return new_stamp
 
-def delete_time_stamp(stamp_id: int, db: Session = Depends(get_session), auth: str = Depends(JWTBearer())):
+def delete_time_stamp(stamp_id: int, db: Session = Depends(get_session), auth: TokenClaims = Depends(JWTBearer())):
     """Deletes a time stamp entry by `stamp_id`, but only if the logged-in user owns it."""
 
     time_stamp = db.query(TimeStamp).filter(TimeStamp.stamp_id == stamp_id).first()
-    payload = decode_jwt(auth)
-    emp_id = payload.get("emp_id")  
+    emp_id = auth.get("emp_id")  
 
     if not emp_id:
         raise HTTPException(status_code=401, detail=EMP_ID_NOT_EXIST)
@@ -126,14 +142,14 @@ def delete_time_stamp(stamp_id: int, db: Session = Depends(get_session), auth: s
             "message": f"TimeStamp with ID {stamp_id} deleted successfully"
         }
 
-def edit_time_stamp(stamp_id: int, stamp_data: TimeStampBase, db: Session = Depends(get_session), auth: str = Depends(JWTBearer())):
+def edit_time_stamp(stamp_id: int, stamp_data: TimeStampBase, db: Session = Depends(get_session), auth: TokenClaims = Depends(JWTBearer())):
     """Edits a timestamp entry by `stamp_id`, but only if the logged-in user owns it."""
 
     time_stamp = db.query(TimeStamp).filter(TimeStamp.stamp_id == stamp_id).first()
     if not time_stamp:
         raise HTTPException(status_code=404, detail=f"TimeStamp with ID {stamp_id} not found.")
 
-    emp_id = decode_jwt(auth).get("emp_id")
+    emp_id = auth.get("emp_id")
     if not emp_id:
         raise HTTPException(status_code=401, detail=EMP_ID_NOT_EXIST)
 
@@ -173,37 +189,31 @@ def edit_time_stamp(stamp_id: int, stamp_data: TimeStampBase, db: Session = Depe
 
     db.commit()
     db.refresh(time_stamp)
+    publish_event(TIMESTAMP_EDITED, time_stamp_event(time_stamp))
 
     return {"message": f"TimeStamp with ID {stamp_id} updated successfully", "updated_timestamp": update_fields}
 
-def fetch_time_stamps(
-    db: Session = Depends(get_session),
-    auth: str = Depends(JWTBearer()),
-    target_date: Optional[date] = None,
-):
-    """Fetches all timestamps for a specific week (defaults to current week)."""
-
-    emp_id = decode_jwt(auth).get("emp_id")
-    if not emp_id:
-        raise HTTPException(status_code=401, detail=EMP_ID_NOT_EXIST)
-
+def get_week_range(target_date: Optional[date] = None):
     if not target_date:
         target_date = datetime.today().date()
 
     start_of_week = target_date - timedelta(days=target_date.weekday()) 
     end_of_week = start_of_week + timedelta(days=6)  
+    return start_of_week, end_of_week
 
-    time_stamps = (
-        db.query(TimeStamp)
+def time_stamps_query(emp_id: str, start_of_week: date, end_of_week: date):
+    return (
+        select(TimeStamp)
+        .options(joinedload(TimeStamp.project), joinedload(TimeStamp.period))
         .filter(
             TimeStamp.emp_id == emp_id,
             TimeStamp.stamp_date >= start_of_week,
             TimeStamp.stamp_date <= end_of_week
         )
         .order_by(TimeStamp.stamp_date, TimeStamp.start_time)
-        .all()
     )
 
+def build_time_stamp_response(start_of_week: date, end_of_week: date, time_stamps) -> TimeStampResponseSchema:
     return TimeStampResponseSchema(
         week_range=WeekRangeSchema(
             start_date=start_of_week.strftime('%Y-%m-%d'),
@@ -229,4 +239,22 @@ def fetch_time_stamps(
             )
             for ts in time_stamps
         ]
-    )
\ No newline at end of file
+    )
+
+async def fetch_time_stamps_async(
+    db: AsyncSession = Depends(get_async_session),
+    auth: TokenClaims = Depends(JWTBearer()),
+    target_date: Optional[date] = None,
+):
+    """Fetches all timestamps for a specific week (defaults to current week); project and period are eager-loaded since lazy loads can't run on an AsyncSession."""
+
+    emp_id = auth.get("emp_id")
+    if not emp_id:
+        raise HTTPException(status_code=401, detail=EMP_ID_NOT_EXIST)
+
+    start_of_week, end_of_week = get_week_range(target_date)
+
+    result = await db.execute(time_stamps_query(emp_id, start_of_week, end_of_week))
+    time_stamps = result.scalars().all()
+
+    return build_time_stamp_response(start_of_week, end_of_week, time_stamps)
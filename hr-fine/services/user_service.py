@@ -1,11 +1,18 @@
-from typing import Any, Dict, List
+import base64, json
+from datetime import date
+from typing import Any, Dict, List, Optional
 from fastapi import HTTPException, Depends
 from database.db import get_session
 from models.user_model import DeductionInfo, Department, HiringInfo, PaymentInfo, PersonalInfo, AddressInfo, Position, RegistrationAddress, ContactInfo  
-from schemas.user_schema import AddressInfoBase,ContactInfoBase, DeductionInfoBase, EmployeeDashboardInfo, EmployeeDetails, HiringInfoBase, PaymentInfoBase,PersonalInfoBase,RegistrationAddressBase, SubmitAllInfoData, SubmitHiringInfo, SubmitPaymentInfo, SubmitUserInfo
+from schemas.user_schema import AddressInfoBase,ContactInfoBase, DeductionInfoBase, EmployeeDashboardInfo, EmployeeDashboardPage, EmployeeDetails, HiringInfoBase, PaymentInfoBase,PersonalInfoBase,RegistrationAddressBase, SubmitAllInfoData, SubmitHiringInfo, SubmitPaymentInfo, SubmitUserInfo, UpdateEmployeeRecord
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, joinedload
 from constants import ID_NOT_FOUND
 from models.auth_model import Users
+from services.reporting_service import move_reporting_line
+from utils.employee_cache import employee_cache
 
 
 def update_model_data(model, data: Dict):
@@ -17,115 +24,107 @@ def create_personal_info(db: Session, emp_id: str, personal_info_data: dict):
     personal_info_data["emp_id"] = emp_id
     db_personal_info = PersonalInfo(**personal_info_data)  
     db.add(db_personal_info)
-    db.commit()
-    db.refresh(db_personal_info)
     return db_personal_info
 
 def create_address_info(db: Session, emp_id: str, address_info_data: dict):
     address_info_data["emp_id"] = emp_id
     db_address_info = AddressInfo(**address_info_data) 
     db.add(db_address_info)
-    db.commit()
-    db.refresh(db_address_info)
     return db_address_info
 
 def create_registration_address(db: Session, emp_id: str, reg_address_data: dict):
     reg_address_data["emp_id"] = emp_id
     db_registration_address = RegistrationAddress(**reg_address_data)  
     db.add(db_registration_address)
-    db.commit()
-    db.refresh(db_registration_address)
     return db_registration_address
 
-def create_contact_info(db: Session, emp_id: str, contact_info_data: dict):
-    user = db.query(Users).filter(Users.emp_id == emp_id).first()
-    if not user:
-        raise HTTPException(
-            status_code=400,
-            detail=f"User with emp_id '{emp_id}' does not exist."
-        )
-
-    contact_info_data["email"] = user.email
+def create_contact_info(db: Session, emp_id: str, contact_info_data: dict, email: str):
+    contact_info_data["email"] = email
     contact_info_data["emp_id"] = emp_id
 
     db_contact_info = ContactInfo(**contact_info_data)
     db.add(db_contact_info)
-    db.commit()
-    db.refresh(db_contact_info)
     return db_contact_info
 
 def create_hiring_info(db: Session, emp_id: str, hiring_info_data: dict):
     hiring_info_data["emp_id"] = emp_id
     db_hiring_info = HiringInfo(**hiring_info_data)
     db.add(db_hiring_info)
-    db.commit()
-    db.refresh(db_hiring_info)
     return db_hiring_info
     
 def create_payment_info(db: Session, emp_id: str, payment_info_data: dict):
     payment_info_data["emp_id"] = emp_id
     db_payment_info = PaymentInfo(**payment_info_data)
     db.add(db_payment_info)
-    db.commit()
-    db.refresh(db_payment_info)
     return db_payment_info
 
 def create_deduction_info(db: Session, emp_id: str, deduction_info_data: dict):
     deduction_info_data["emp_id"] = emp_id
     db_deduction_info = DeductionInfo(**deduction_info_data)
     db.add(db_deduction_info)
-    db.commit()
-    db.refresh(db_deduction_info)
     return db_deduction_info
 
-def process_model_creation(
+def existing_sections_query(emp_id: str, models):
+    """One row: the user's email plus, per section table, the id of an existing record (or NULL)."""
+    query = select(Users.email, *(model.id.label(model.__tablename__) for model in models)).select_from(Users)
+    for model in models:
+        query = query.outerjoin(model, model.emp_id == Users.emp_id)
+    return query.where(Users.emp_id == emp_id).limit(1)
+
+def process_all_sections(
     db: Session,
     emp_id: str,
-    model_cls,
-    existing_query_cls,
-    creation_func,
-    data_dict: dict,
-    model_name: str,
+    data_sections: List[Dict[str, Any]]
 ):
+    """
+    Existing sections are reported and left alone; every new section is added and then
+    flushed and committed together, so a failure leaves none of them behind.
+    """
+    data_sections = [section for section in data_sections if section["data_dict"]]
+    models = [section["model_cls"] for section in data_sections]
 
-    try:
-        existing_data = db.query(existing_query_cls).filter(existing_query_cls.emp_id == emp_id).first()
-        if existing_data:
-            return {
+    existing = db.execute(existing_sections_query(emp_id, models)).first()
+    if not existing:
+        raise HTTPException(status_code=400, detail=f"User with emp_id '{emp_id}' does not exist.")
+
+    responses = {}
+    created = {}
+    for section in data_sections:
+        model_cls, model_name = section["model_cls"], section["model_name"]
+        if getattr(existing, model_cls.__tablename__) is not None:
+            responses[model_name] = {
                 "status": "error",
                 "error": f"{model_name} with emp_id '{emp_id}' already exists."
             }
-        
-        new_data = creation_func(db, emp_id, data_dict)
-        return {
+            continue
+        if model_cls is ContactInfo:
+            created[model_name] = section["creation_func"](db, emp_id, section["data_dict"], email=existing.email)
+        else:
+            created[model_name] = section["creation_func"](db, emp_id, section["data_dict"])
+
+    if created:
+        try:
+            ## flush first so a constraint violation on the new rows is reported below
+            db.flush()
+            hiring_info = next((record for record in created.values() if isinstance(record, HiringInfo)), None)
+            if hiring_info is not None:
+                move_reporting_line(db, emp_id, hiring_info.manager)
+            db.commit()
+        except HTTPException:
+            db.rollback()
+            raise
+        except IntegrityError as e:
+            db.rollback()
+            raise HTTPException(status_code=400, detail=f"Failed to submit employee data: {e.orig}")
+        except Exception as e:
+            db.rollback()
+            raise HTTPException(status_code=500, detail=f"Failed to submit employee data: {str(e)}")
+
+    for model_name, new_data in created.items():
+        responses[model_name] = {
             "status": "success",
             "data": new_data
         }
-    except Exception as e:
-        db.rollback()
-        return {
-            "status": "error",
-            "error": str(e)
-        }
-    
-def process_all_sections(
-    db: Session,
-    emp_id: str,
-    data_sections: List[Dict[str, Any]]
-):
-
-    responses = {}
-    for section in data_sections:
-        if section["data_dict"]:  # Process only if data exists
-            responses[section["model_name"]] = process_model_creation(
-                db=db,
-                emp_id=emp_id,
-                model_cls=section["model_cls"],
-                existing_query_cls=section["existing_query_cls"],
-                creation_func=section["creation_func"],
-                data_dict=section["data_dict"],
-                model_name=section["model_name"]
-            )
     return responses
 
 def submit_all_user_data(db: Session, data: SubmitAllInfoData) -> dict:
@@ -138,28 +137,24 @@ def submit_all_user_data(db: Session, data: SubmitAllInfoData) -> dict:
             {
                 "data_dict": user_info.personal_info.model_dump() if user_info.personal_info else None,
                 "model_cls": PersonalInfo,
-                "existing_query_cls": PersonalInfo,
                 "creation_func": create_personal_info,
                 "model_name": "Personal info"
             },
             {
                 "data_dict": user_info.address_info.model_dump() if user_info.address_info else None,
                 "model_cls": AddressInfo,
-                "existing_query_cls": AddressInfo,
                 "creation_func": create_address_info,
                 "model_name": "Address info"
             },
             {
                 "data_dict": user_info.registration_address.model_dump() if user_info.registration_address else None,
                 "model_cls": RegistrationAddress,
-                "existing_query_cls": RegistrationAddress,
                 "creation_func": create_registration_address,
                 "model_name": "Registration address"
             },
             {
                 "data_dict": user_info.contact_info.model_dump() if user_info.contact_info else None,
                 "model_cls": ContactInfo,
-                "existing_query_cls": ContactInfo,
                 "creation_func": create_contact_info,
                 "model_name": "Contact info"
             }
@@ -170,7 +165,6 @@ def submit_all_user_data(db: Session, data: SubmitAllInfoData) -> dict:
         data_sections.append({
             "data_dict": hiring_info.hiring_info.model_dump() if hiring_info.hiring_info else None,
             "model_cls": HiringInfo,
-            "existing_query_cls": HiringInfo,
             "creation_func": create_hiring_info,
             "model_name": "Hiring info"
         })
@@ -181,14 +175,12 @@ def submit_all_user_data(db: Session, data: SubmitAllInfoData) -> dict:
             {
                 "data_dict": payment_info.payment_info.model_dump() if payment_info.payment_info else None,
                 "model_cls": PaymentInfo,
-                "existing_query_cls": PaymentInfo,
                 "creation_func": create_payment_info,
                 "model_name": "Payment info"
             },
             {
                 "data_dict": payment_info.deduction_info.model_dump() if payment_info.deduction_info else None,
                 "model_cls": DeductionInfo,
-                "existing_query_cls": DeductionInfo,
                 "creation_func": create_deduction_info,
                 "model_name": "Deduction info"
             }
@@ -196,23 +188,85 @@ def submit_all_user_data(db: Session, data: SubmitAllInfoData) -> dict:
 
     return process_all_sections(db, emp_id, data_sections)
 
-def get_all_employees_dashboard(db: Session):
-    employees = (
-        db.query(
+EMPLOYEE_DASHBOARD_MAX_LIMIT = 200
+
+def encode_dashboard_cursor(order: str, emp_id: str) -> str:
+    raw = json.dumps({"order": order, "emp_id": emp_id})
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_dashboard_cursor(cursor: str, order: str) -> str:
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        emp_id = str(data["emp_id"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+    if data.get("order") != order:
+        raise HTTPException(status_code=400, detail="Cursor does not match the requested sort order.")
+    return emp_id
+
+def employee_dashboard_filters(
+    department: Optional[int] = None,
+    position: Optional[int] = None,
+    working_location: Optional[str] = None,
+    working_status: Optional[str] = None,
+):
+    filters = []
+    if department is not None:
+        filters.append(HiringInfo.department == department)
+    if position is not None:
+        filters.append(HiringInfo.position == position)
+    if working_location:
+        filters.append(HiringInfo.working_location == working_location)
+    if working_status:
+        filters.append(HiringInfo.working_status == working_status)
+    return filters
+
+def employee_dashboard_query(
+    filters=(),
+    order: str = "asc",
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+):
+    """
+    Pages are keyed on users.emp_id alone: its unique index makes every page a short
+    range scan however deep the cursor is. Ordering by name, position or location
+    would sort the whole filtered join on every page, so those orders are not offered
+    here; use /search to find people by name.
+    """
+    query = (
+        select(
             Users.emp_id,
             PersonalInfo.id,
             PersonalInfo.thai_name,
             Position.position.label("position_name"),
             HiringInfo.working_location,
-            Users.email
+            Users.email,
         )
         .outerjoin(PersonalInfo, Users.emp_id == PersonalInfo.emp_id)
-        .outerjoin(HiringInfo, Users.emp_id == HiringInfo.emp_id)      
-        .outerjoin(ContactInfo, Users.emp_id == ContactInfo.emp_id) 
-        .outerjoin(Position, HiringInfo.position == Position.id)   
-        .all()
+        .outerjoin(HiringInfo, Users.emp_id == HiringInfo.emp_id)
+        .outerjoin(Position, HiringInfo.position == Position.id)
+        .where(*filters)
+    )
+
+    ## keyset: continue strictly after the emp_id of the last row served
+    if cursor:
+        emp_id = decode_dashboard_cursor(cursor, order)
+        query = query.where(Users.emp_id < emp_id if order == "desc" else Users.emp_id > emp_id)
+
+    query = query.order_by(Users.emp_id.desc() if order == "desc" else Users.emp_id.asc())
+
+    if limit is not None:
+        query = query.limit(limit + 1)
+    return query
+
+def employee_dashboard_count_query(filters=()):
+    return (
+        select(func.count(Users.id))
+        .outerjoin(HiringInfo, Users.emp_id == HiringInfo.emp_id)
+        .where(*filters)
     )
 
+def build_employee_dashboard(employees) -> List[EmployeeDashboardInfo]:
     return [
         EmployeeDashboardInfo(
             emp_id=emp.emp_id,
@@ -225,9 +279,30 @@ def get_all_employees_dashboard(db: Session):
         for emp in employees
     ]
 
-def get_employee_details_by_id(db: Session, emp_id: str) -> EmployeeDetails:
-    user = (
-        db.query(Users)
+def build_employee_dashboard_page(rows, order: str, limit: int, total: Optional[int] = None) -> EmployeeDashboardPage:
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_dashboard_cursor(order, rows[-1].emp_id)
+    return EmployeeDashboardPage(items=build_employee_dashboard(rows), next_cursor=next_cursor, total=total)
+
+async def get_all_employees_dashboard_async(
+    db: AsyncSession,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    order: str = "asc",
+    include_total: bool = False,
+    **filter_args,
+):
+    filters = employee_dashboard_filters(**filter_args)
+    result = await db.execute(employee_dashboard_query(filters, order, cursor, limit))
+    rows = result.all()
+    total = (await db.execute(employee_dashboard_count_query(filters))).scalar_one() if include_total else None
+    return build_employee_dashboard_page(rows, order, limit, total)
+
+def employee_with_sections_query():
+    return (
+        select(Users)
         .options(
             joinedload(Users.personal_info),
             joinedload(Users.address_info),
@@ -237,18 +312,14 @@ def get_employee_details_by_id(db: Session, emp_id: str) -> EmployeeDetails:
             joinedload(Users.payment_info),
             joinedload(Users.deduction_info),
         )
-        .filter(Users.emp_id == emp_id)
-        .first()
     )
 
-    if not user:
-        raise HTTPException(status_code=404, detail=f"Employee with emp_id '{emp_id}' not found.")
-
-    personal_info_data = user.personal_info.__dict__ if user.personal_info else None
+def build_employee_details(user: Users) -> EmployeeDetails:
+    personal_info_data = dict(user.personal_info.__dict__) if user.personal_info else None
     if personal_info_data and personal_info_data.get("date_birth"):
         personal_info_data["date_birth"] = personal_info_data["date_birth"].isoformat()
 
-    deduction_info_data = user.deduction_info.__dict__ if user.deduction_info else None
+    deduction_info_data = dict(user.deduction_info.__dict__) if user.deduction_info else None
     if deduction_info_data and deduction_info_data.get("enroll_date"):
         deduction_info_data["enroll_date"] = deduction_info_data["enroll_date"].isoformat()
 
@@ -261,9 +332,27 @@ def get_employee_details_by_id(db: Session, emp_id: str) -> EmployeeDetails:
         contact_info=ContactInfoBase(**user.contact_info.__dict__) if user.contact_info else None,
         hiring_info=HiringInfoBase(**user.hiring_info.__dict__) if user.hiring_info else None,
         payment_info=PaymentInfoBase(**user.payment_info.__dict__) if user.payment_info else None,
-        deduction_info=DeductionInfoBase(**user.deduction_info.__dict__) if user.deduction_info else None,
+        deduction_info=DeductionInfoBase(**deduction_info_data) if deduction_info_data else None,
     )
 
+def get_employee_details_by_id(db: Session, emp_id: str) -> EmployeeDetails:
+    user = db.execute(employee_with_sections_query().filter(Users.emp_id == emp_id)).unique().scalars().first()
+
+    if not user:
+        raise HTTPException(status_code=404, detail=f"Employee with emp_id '{emp_id}' not found.")
+
+    return build_employee_details(user)
+
+def get_employee_details_json(db: Session, emp_id: str) -> bytes:
+    """Serialized EmployeeDetails, served from the per-worker cache when possible."""
+    cached = employee_cache.get(emp_id)
+    if cached is not None:
+        return cached
+    generation = employee_cache.generation
+    payload = get_employee_details_by_id(db, emp_id).model_dump_json().encode()
+    employee_cache.put(emp_id, payload, generation)
+    return payload
+
 def update_or_create_employee_info(db: Session, emp_id: str, model, update_data: dict, create_if_not_exists=True):
     record = db.query(model).filter(model.emp_id == emp_id).first()
 
@@ -319,8 +408,7 @@ def update_registration_address(db: Session, emp_id: str, update_data: dict):
 def update_contact_info(db: Session, emp_id: str, update_data: dict):
     return update_or_create_employee_info(db, emp_id, ContactInfo, update_data)
 
-def update_hiring_info(db: Session, emp_id: str, update_data: dict):
-
+def validate_hiring_info(db: Session, update_data: dict):
     if "position" in update_data:
         position = db.query(Position).filter(Position.id == update_data["position"]).first()
         if not position:
@@ -335,7 +423,10 @@ def update_hiring_info(db: Session, emp_id: str, update_data: dict):
         if update_data["terminate_date"] and update_data["terminate_date"] < update_data["start_date"]:
             raise HTTPException(status_code=400, detail="Terminate date cannot be before start date.")
 
-
+def update_hiring_info(db: Session, emp_id: str, update_data: dict):
+    validate_hiring_info(db, update_data)
+    if update_data.get("manager") is not None:
+        move_reporting_line(db, emp_id, update_data["manager"])
     return update_or_create_employee_info(db, emp_id, HiringInfo, update_data)
 
 def update_payment_info(db: Session, emp_id: str, update_data: dict):
@@ -344,3 +435,65 @@ def update_payment_info(db: Session, emp_id: str, update_data: dict):
 def update_deduction_info(db: Session, emp_id: str, update_data: dict):
     return update_or_create_employee_info(db, emp_id, DeductionInfo, update_data)
 
+## Sent as "YYYY-MM-DD" strings but stored in Date columns.
+EMPLOYEE_DATE_FIELDS = {
+    "personal_info": ("date_birth",),
+    "deduction_info": ("enroll_date",),
+}
+
+def parse_date_fields(section: str, fields: dict):
+    for key in EMPLOYEE_DATE_FIELDS.get(section, ()):
+        if isinstance(fields.get(key), str):
+            try:
+                fields[key] = date.fromisoformat(fields[key])
+            except ValueError:
+                raise HTTPException(status_code=400, detail=f"Invalid {key} '{fields[key]}', expected YYYY-MM-DD.")
+
+EMPLOYEE_SECTIONS = {
+    "personal_info": PersonalInfo,
+    "address_info": AddressInfo,
+    "registration_address": RegistrationAddress,
+    "contact_info": ContactInfo,
+    "hiring_info": HiringInfo,
+    "payment_info": PaymentInfo,
+    "deduction_info": DeductionInfo,
+}
+
+def patch_employee_record(db: Session, emp_id: str, data: UpdateEmployeeRecord) -> EmployeeDetails:
+    """
+    Applies any subset of sections in one transaction: one query loads the user with
+    every section, missing sections are created, and only the fields sent are written.
+    """
+    sections = {name: fields for name, fields in data.model_dump(exclude_unset=True).items() if fields}
+    if not sections:
+        raise HTTPException(status_code=400, detail="No sections to update.")
+    for name, fields in sections.items():
+        parse_date_fields(name, fields)
+
+    user = db.execute(employee_with_sections_query().filter(Users.emp_id == emp_id)).unique().scalars().first()
+    if not user:
+        raise HTTPException(status_code=404, detail=f"Employee with emp_id '{emp_id}' not found.")
+
+    if "hiring_info" in sections:
+        validate_hiring_info(db, sections["hiring_info"])
+        if sections["hiring_info"].get("manager") is not None:
+            move_reporting_line(db, emp_id, sections["hiring_info"]["manager"])
+
+    for name, fields in sections.items():
+        record = getattr(user, name)
+        if record is None:
+            if name == "contact_info":
+                fields["email"] = user.email
+            setattr(user, name, EMPLOYEE_SECTIONS[name](emp_id=emp_id, **fields))
+            continue
+        for key, value in fields.items():
+            if value is not None:
+                setattr(record, key, value)
+
+    try:
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=f"Failed to update employee: {e.orig}")
+
+    return build_employee_details(user)
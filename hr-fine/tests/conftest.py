@@ -0,0 +1,37 @@
+import os
+
+## database.db and utils.jwt_util read these at import time; the tests below run on SQLite.
+for key, value in {
+    "MYSQL_USER": "test",
+    "MYSQL_ROOT_PASSWORD": "test",
+    "MYSQL_HOST": "localhost",
+    "MYSQL_PORT": "3306",
+    "MYSQL_DB": "hr_fine_test",
+    "ALGORITHM": "HS256",
+    "JWT_SECRET_KEY": "test-secret",
+    "JWT_REFRESH_SECRET_KEY": "test-refresh-secret",
+}.items():
+    os.environ.setdefault(key, value)
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from database.db import Base
+from database.query_stats import register_query_listeners
+import models.auth_model, models.client_model, models.email_model, models.project_model, models.timesheet_model, models.user_model
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    register_query_listeners(engine)
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+@pytest.fixture
+def db(engine):
+    session = sessionmaker(bind=engine, expire_on_commit=False)()
+    yield session
+    session.close()
@@ -0,0 +1,52 @@
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from models.auth_model import Users
+from models.email_model import EmailOutbox
+from schemas.auth_schema import BulkUserRow
+from services import auth_service
+
+@pytest.fixture
+def bulk(engine, monkeypatch):
+    """Runs bulk registration inline against the test database; emp_ids come from a counter."""
+    numbers = iter(range(1, 1000))
+    monkeypatch.setattr(auth_service, "SessionLocal", sessionmaker(bind=engine, expire_on_commit=False))
+    monkeypatch.setattr(auth_service, "allocate_emp_ids", lambda engine, count: [f"67{next(numbers):03d}" for _ in range(count)])
+    monkeypatch.setattr(auth_service._bulk_executor, "submit", lambda fn, *args: fn(*args))
+
+def test_bulk_registration_job(db, bulk):
+    db.add(Users(emp_id="67000", password="x", email="taken@example.com"))
+    db.commit()
+
+    rows = [BulkUserRow(email=email) for email in ("a@example.com", "not-an-email", "a@example.com", "taken@example.com", "b@example.com")]
+    job = auth_service.register_users_bulk(rows, db)
+
+    assert (job.status, job.total, job.created, job.failed) == ("done", 5, 2, 3)
+    assert [result.status for result in job.results] == ["created", "error", "error", "error", "created"]
+    assert [result.emp_id for result in job.results if result.emp_id] == ["67001", "67002"]
+    assert all(result.password is None for result in job.results)
+    assert db.query(Users).count() == 3
+    assert db.query(EmailOutbox).count() == 2
+
+def test_unknown_job_is_404(db):
+    with pytest.raises(auth_service.HTTPException) as error:
+        auth_service.get_bulk_registration_job("missing", db)
+    assert error.value.status_code == 404
+
+def test_bulk_registration_conflict_fails_only_that_row(db, bulk, monkeypatch):
+    hash_passwords = auth_service.hash_passwords
+    def register_during_hashing(passwords):
+        ## another request registers one of the emails after the duplicate check
+        with auth_service.SessionLocal() as other:
+            other.add(Users(emp_id="67999", password="x", email="late@example.com"))
+            other.commit()
+        return hash_passwords(passwords)
+    monkeypatch.setattr(auth_service, "hash_passwords", register_during_hashing)
+
+    rows = [BulkUserRow(email=email) for email in ("a@example.com", "late@example.com", "b@example.com")]
+    job = auth_service.register_users_bulk(rows, db)
+
+    assert (job.status, job.created, job.failed) == ("done", 2, 1)
+    assert [result.status for result in job.results] == ["created", "error", "created"]
+    assert db.query(Users).filter(Users.email.in_(["a@example.com", "b@example.com"])).count() == 2
+    assert db.query(EmailOutbox).count() == 2
@@ -0,0 +1,79 @@
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from models.email_model import EmailOutbox
+from utils import email_outbox
+
+class FakeSMTP:
+    def __init__(self, failing=(), on_send=None):
+        self.failing = set(failing)
+        self.on_send = on_send
+        self.sent = []
+
+    def send_message(self, message):
+        if self.on_send:
+            self.on_send()
+        if message["To"] in self.failing:
+            raise OSError(f"rejected {message['To']}")
+        self.sent.append(message["To"])
+
+@pytest.fixture
+def outbox(engine, monkeypatch):
+    monkeypatch.setattr(email_outbox, "SessionLocal", sessionmaker(bind=engine, expire_on_commit=False))
+    monkeypatch.setattr(email_outbox, "EMAIL_MAX_ATTEMPTS", 2)
+    def use(server):
+        @contextmanager
+        def connection():
+            yield server
+        monkeypatch.setattr(email_outbox, "smtp_connection", connection)
+        return server
+    return use
+
+def queue(db, *recipients):
+    for to_email in recipients:
+        db.add(EmailOutbox(to_email=to_email, subject="Welcome", body="Temporary Password: x"))
+    db.commit()
+
+def test_rows_are_committed_as_sending_before_smtp(db, outbox):
+    queue(db, "a@example.com", "b@example.com")
+    seen = []
+    def check_claim():
+        with email_outbox.SessionLocal() as other:
+            seen.append({email.status for email in other.query(EmailOutbox)})
+    server = outbox(FakeSMTP(on_send=check_claim))
+
+    assert email_outbox.deliver_pending_emails() == 2
+    assert seen == [{"sending"}, {"sending"}]
+    assert server.sent == ["a@example.com", "b@example.com"]
+    db.expire_all()
+    assert {(email.status, email.body, email.claimed_date) for email in db.query(EmailOutbox)} == {("sent", None, None)}
+
+def test_failed_sends_retry_then_drop_the_body(db, outbox):
+    queue(db, "a@example.com", "bad@example.com")
+    outbox(FakeSMTP(failing={"bad@example.com"}))
+
+    assert email_outbox.deliver_pending_emails() == 1
+    db.expire_all()
+    bad = db.query(EmailOutbox).filter_by(to_email="bad@example.com").one()
+    assert (bad.status, bad.attempts, bad.body) == ("pending", 1, "Temporary Password: x")
+
+    bad.next_attempt_at = datetime.now() - timedelta(seconds=1)
+    db.commit()
+    assert email_outbox.deliver_pending_emails() == 0
+    db.expire_all()
+    bad = db.query(EmailOutbox).filter_by(to_email="bad@example.com").one()
+    assert (bad.status, bad.attempts, bad.body) == ("failed", 2, None)
+    assert "rejected" in bad.last_error
+
+def test_stale_claims_are_released(db, outbox):
+    queue(db, "a@example.com")
+    email = db.query(EmailOutbox).one()
+    email.status, email.claimed_date = "sending", datetime.now() - timedelta(seconds=email_outbox.EMAIL_CLAIM_TIMEOUT_SECONDS + 1)
+    db.commit()
+    server = outbox(FakeSMTP())
+
+    assert email_outbox.deliver_pending_emails() == 1
+    assert server.sent == ["a@example.com"]
+    assert email_outbox.get_outbox_status() == {"pending": 0, "sending": 0, "sent": 1, "failed": 0}
@@ -0,0 +1,46 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from sqlalchemy import create_engine, delete
+
+from models.auth_model import EmpIdSequence, Users
+from services import emp_id_allocator
+from services.emp_id_allocator import allocate_emp_ids
+
+## The allocator relies on MySQL's INSERT ... ON DUPLICATE KEY UPDATE and LAST_INSERT_ID(expr).
+DATABASE_URL = os.getenv("DATABASE_URL", "")
+pytestmark = pytest.mark.skipif(not DATABASE_URL.startswith("mysql"), reason="DATABASE_URL is not a MySQL database")
+
+TEST_YEAR = 2599  ## emp_ids "99xxx"; the sequence row is removed afterwards
+THREADS = 8
+ROUNDS = 10
+COUNT = 3
+
+@pytest.fixture
+def mysql_engine():
+    engine = create_engine(DATABASE_URL, pool_size=THREADS)
+    Users.__table__.create(engine, checkfirst=True)
+    EmpIdSequence.__table__.create(engine, checkfirst=True)
+    with engine.begin() as connection:
+        connection.execute(delete(EmpIdSequence).where(EmpIdSequence.year == TEST_YEAR))
+    emp_id_allocator._seeded_years.discard(TEST_YEAR)
+    yield engine
+    with engine.begin() as connection:
+        connection.execute(delete(EmpIdSequence).where(EmpIdSequence.year == TEST_YEAR))
+    emp_id_allocator._seeded_years.discard(TEST_YEAR)
+    engine.dispose()
+
+def test_concurrent_allocations_are_unique_and_contiguous(mysql_engine):
+    def allocate(_):
+        return [allocate_emp_ids(mysql_engine, COUNT, TEST_YEAR) for _ in range(ROUNDS)]
+
+    with ThreadPoolExecutor(max_workers=THREADS) as pool:
+        blocks = [block for blocks in pool.map(allocate, range(THREADS)) for block in blocks]
+
+    numbers = [int(emp_id[2:]) for block in blocks for emp_id in block]
+    assert len(numbers) == THREADS * ROUNDS * COUNT
+    assert len(set(numbers)) == len(numbers)
+    assert sorted(numbers) == list(range(min(numbers), min(numbers) + len(numbers)))
+    for block in blocks:
+        block_numbers = [int(emp_id[2:]) for emp_id in block]
+        assert block_numbers == list(range(block_numbers[0], block_numbers[0] + COUNT))
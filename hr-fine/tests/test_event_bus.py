@@ -0,0 +1,29 @@
+import queue, threading, time
+
+from utils import event_bus
+
+def test_stop_does_not_hang_on_a_full_queue(monkeypatch):
+    release = threading.Event()
+    delivered = []
+    broker = event_bus.LocalBroker()
+    broker.subscribe("*", lambda event: (release.wait(), delivered.append(event["payload"]["n"])))
+    monkeypatch.setattr(event_bus, "broker", broker)
+    monkeypatch.setattr(event_bus, "_queue", queue.Queue(maxsize=3))
+    monkeypatch.setattr(event_bus, "_dispatcher", None)
+
+    for n in range(5):
+        event_bus.publish_event("test.event", {"n": n})
+        time.sleep(0.05)  ## let the dispatcher pick up the first event and block on it
+
+    start = time.monotonic()
+    dispatcher = event_bus._dispatcher
+    release_later = threading.Timer(0.5, release.set)
+    release_later.start()
+    event_bus.stop_event_bus(timeout=0.2)
+    release_later.join()
+    dispatcher.join(2)
+
+    assert time.monotonic() - start < 2
+    assert not dispatcher.is_alive()
+    ## event 0 was in flight, 4 was dropped as the queue was full, 1 made room for the stop marker
+    assert delivered == [0, 2, 3]
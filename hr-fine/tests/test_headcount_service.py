@@ -0,0 +1,52 @@
+import random
+from datetime import date
+
+from models.auth_model import Users
+from models.user_model import HiringInfo
+from services.headcount_service import get_headcount, headcount_drift, stored_headcount
+
+def hiring_info(emp_id: str, rng: random.Random) -> HiringInfo:
+    return HiringInfo(
+        emp_id=emp_id,
+        start_date=date(2024, 1, 1),
+        working_status=rng.choice(["active", "probation"]),
+        prodation_date=date(2024, 4, 1),
+        terminate_date=date(2099, 1, 1),
+        emp_type=rng.choice(["full-time", "contract"]),
+        working_location=rng.choice(["Bangkok", "Chiang Mai"]),
+        contract_type="permanent",
+        department=rng.randint(1, 3),
+        position=rng.randint(1, 3),
+        manager="",
+    )
+
+def test_headcount_follows_hiring_info_writes(db):
+    rng = random.Random(24)
+    for i in range(40):
+        db.add(Users(emp_id=f"67{i:03d}", password="x", email=f"user{i}@example.com"))
+        db.add(hiring_info(f"67{i:03d}", rng))
+    db.commit()
+    assert headcount_drift(db) == {}
+    assert sum(stored_headcount(db).values()) == 40
+
+    records = db.query(HiringInfo).all()
+    for record in rng.sample(records, 15):
+        record.department = rng.randint(1, 3)
+        record.position = rng.randint(1, 3)
+        record.working_status = rng.choice(["active", "probation", "resigned"])
+    db.commit()
+    assert headcount_drift(db) == {}
+
+    for record in rng.sample(records, 5):
+        db.delete(record)
+    db.commit()
+    assert headcount_drift(db) == {}
+    assert sum(stored_headcount(db).values()) == 35
+
+    record = db.query(HiringInfo).first()
+    record.department = 99
+    db.add(hiring_info("67999", rng))
+    db.flush()
+    db.rollback()
+    assert headcount_drift(db) == {}
+    assert get_headcount(db, [])["total"] == 35
@@ -0,0 +1,50 @@
+import asyncio
+import time
+from collections import OrderedDict
+from types import SimpleNamespace
+
+import jwt
+import pytest
+from starlette.requests import Request
+
+from utils import jwt_bearer
+from utils.jwt_bearer import JWTBearer, decode_jwt
+
+@pytest.fixture
+def decodes(monkeypatch):
+    """Empty cache; returns the list of tokens that actually went through jwt.decode."""
+    monkeypatch.setattr(jwt_bearer, "_verified_tokens", OrderedDict())
+    calls = []
+    def counting_decode(token, *args, **kwargs):
+        calls.append(token)
+        return jwt.decode(token, *args, **kwargs)
+    monkeypatch.setattr(jwt_bearer, "jwt", SimpleNamespace(decode=counting_decode))
+    return calls
+
+def make_token(sub: str, expires_in: int = 3600) -> str:
+    return jwt.encode({"sub": sub, "exp": int(time.time()) + expires_in}, jwt_bearer.JWT_SECRET_KEY, jwt_bearer.ALGORITHM)
+
+def test_cached_token_returns_the_same_claims(decodes):
+    token = make_token("1")
+    request = Request({"type": "http", "headers": [(b"authorization", f"Bearer {token}".encode())]})
+
+    claims = asyncio.run(JWTBearer()(request))
+    assert asyncio.run(JWTBearer()(request)) is claims
+    assert decode_jwt(token) is decode_jwt(token)
+    assert decodes == [token]
+
+def test_cache_drops_expired_and_least_recently_used_tokens(decodes, monkeypatch):
+    monkeypatch.setattr(jwt_bearer, "JWT_CACHE_SIZE", 2)
+    short, first, second = make_token("1", expires_in=60), make_token("2"), make_token("3")
+
+    decode_jwt(short)
+    later = time.time() + 120
+    monkeypatch.setattr(jwt_bearer, "time", SimpleNamespace(time=lambda: later))
+    decode_jwt(short)
+    assert decodes == [short, short]
+
+    decode_jwt(first)
+    decode_jwt(second)
+    decode_jwt(first)
+    assert list(jwt_bearer._verified_tokens) == [second, first]
+    assert decode_jwt(make_token("4", expires_in=-1)) is None
@@ -0,0 +1,36 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from models.auth_model import Users
+from schemas.auth_schema import UserLogin
+from services import auth_service
+from utils import jwt_bearer
+from utils.jwt_bearer import JWTBearer
+from utils.jwt_util import get_hashed_password
+from utils.revocation import RevocationSet
+
+def authenticate(token: str):
+    request = Request({"type": "http", "headers": [(b"authorization", f"Bearer {token}".encode())]})
+    return asyncio.run(JWTBearer()(request))
+
+def test_logout_revokes_every_access_token_of_the_session(db, monkeypatch):
+    revoked = RevocationSet()
+    monkeypatch.setattr(auth_service, "revoked_tokens", revoked)
+    monkeypatch.setattr(jwt_bearer, "revoked_tokens", revoked)
+    db.add(Users(emp_id="69001", email="logout@example.com", password=get_hashed_password("logout-check")))
+    db.commit()
+
+    tokens = auth_service.login_user(UserLogin(emp_id="69001", password="logout-check"), db)
+    earlier = auth_service.access_refresh_token(tokens["refresh_token"], db)["access_token"]
+    latest = auth_service.access_refresh_token(tokens["refresh_token"], db)["access_token"]
+    assert authenticate(earlier)["sid"] == authenticate(latest)["sid"]
+
+    auth_service.logout_user(authenticate(latest), db)
+
+    for token in (tokens["access_token"], earlier, latest):
+        with pytest.raises(HTTPException) as exc:
+            authenticate(token)
+        assert exc.value.status_code == 403
@@ -0,0 +1,27 @@
+import json
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from schemas.optional_schema import AddCompany
+from services import optional_service
+from utils.reference_cache import ReferenceDataCache
+
+@pytest.fixture
+def primary(engine, monkeypatch):
+    monkeypatch.setattr(optional_service, "SessionLocal", sessionmaker(bind=engine, expire_on_commit=False))
+    monkeypatch.setattr(optional_service, "reference_cache", ReferenceDataCache())
+
+def test_cache_misses_load_from_primary(primary):
+    with optional_service.SessionLocal() as writer:
+        optional_service.add_company(AddCompany(company="Acme"), writer)
+
+    assert optional_service.fetch_company() == [{"id": 1, "company": "Acme"}]
+
+    content, etag = optional_service.fetch_all_reference_data()
+    assert json.loads(content)["companies"] == [{"id": 1, "company": "Acme"}]
+
+    with optional_service.SessionLocal() as writer:
+        optional_service.add_company(AddCompany(company="Globex"), writer)
+    content, new_etag = optional_service.fetch_all_reference_data()
+    assert new_etag != etag
+    assert [company["company"] for company in json.loads(content)["companies"]] == ["Acme", "Globex"]
@@ -0,0 +1,27 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi import HTTPException
+
+from utils import password_hasher
+
+def test_submit_turns_callers_away_once_pending_cap_is_reached(monkeypatch):
+    executor = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(password_hasher, "_executor", executor)
+    pending = threading.BoundedSemaphore(2)
+    monkeypatch.setattr(password_hasher, "_pending", pending)
+    release = threading.Event()
+
+    ## one running, one queued behind it
+    futures = [password_hasher.submit(release.wait) for _ in range(2)]
+    with pytest.raises(HTTPException) as error:
+        password_hasher.submit(release.wait)
+    assert error.value.status_code == 503
+    assert error.value.headers == {"Retry-After": "1"}
+
+    release.set()
+    assert all(future.result(timeout=5) for future in futures)
+    ## both slots come back once the jobs finish (the release runs in a done callback)
+    assert pending.acquire(timeout=5) and pending.acquire(timeout=5)
+    executor.shutdown()
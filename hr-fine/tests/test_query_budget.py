@@ -0,0 +1,19 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from database.query_budget_check import LOGIN_MAX_QUERIES, REFRESH_MAX_QUERIES, check_auth_query_budgets
+from database.query_stats import SLOW_QUERY_MS, assert_max_queries
+
+def test_login_and_refresh_stay_within_query_budget(db):
+    counts = check_auth_query_budgets(db)
+    assert counts == {"login_user": LOGIN_MAX_QUERIES, "access_refresh_token": REFRESH_MAX_QUERIES}
+
+def test_failed_statements_do_not_skew_later_timings(engine):
+    with engine.connect() as conn:
+        with pytest.raises(OperationalError):
+            conn.execute(text("SELECT * FROM no_such_table"))
+        with assert_max_queries(1) as stats:
+            conn.execute(text("SELECT 1"))
+        assert "query_start" not in conn.info
+    assert stats.count == 1 and stats.total_ms < SLOW_QUERY_MS
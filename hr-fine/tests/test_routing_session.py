@@ -0,0 +1,30 @@
+from sqlalchemy import create_engine, select, update
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from database.db import Base
+from database.routing_session import RoutingSession
+from models.user_model import Company
+
+def test_reads_go_to_the_replica_until_the_first_write(engine):
+    replica = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(replica)
+    with sessionmaker(bind=engine)() as writer:
+        writer.add(Company(company="Acme"))
+        writer.commit()
+    ReadSession = sessionmaker(class_=RoutingSession, primary=engine, replica=replica, expire_on_commit=False)
+
+    with ReadSession() as session:
+        ## the replica has not caught up yet
+        assert session.scalars(select(Company.company)).all() == []
+        session.add(Company(company="Globex"))
+        session.flush()
+        assert session.get_bind() is engine
+        assert session.scalars(select(Company.company).order_by(Company.id)).all() == ["Acme", "Globex"]
+        session.commit()
+
+    with ReadSession() as session:
+        assert session.get_bind() is replica
+        session.execute(update(Company).where(Company.company == "Acme").values(company="Acme Ltd"))
+        assert session.scalars(select(Company.company).order_by(Company.id)).all() == ["Acme Ltd", "Globex"]
+    replica.dispose()
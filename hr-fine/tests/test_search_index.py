@@ -0,0 +1,58 @@
+from types import SimpleNamespace
+
+from utils.search_index import EMPLOYEE, PERSONAL_FIELDS, SearchIndex, build_changes
+
+NAMES = ["Somchai", "Somsri", "Malee", "Anan", "Kanya", "Prasert", "Wichai", "Niran", "Suda", "Thong"]
+
+def employees(count: int):
+    users = [SimpleNamespace(emp_id=f"67{i:03d}", email=f"user{i}@example.com") for i in range(count)]
+    personal = [
+        SimpleNamespace(
+            emp_id=f"67{i:03d}",
+            thai_name=None,
+            eng_name=f"{NAMES[i % len(NAMES)]} Family{i}",
+            thai_nickname=None,
+            eng_nickname=f"nick{i}",
+        )
+        for i in range(count)
+    ]
+    return users, personal
+
+def assert_token_list_consistent(index: SearchIndex):
+    assert index._token_list == sorted(index._tokens)
+
+def test_full_build_indexes_every_employee():
+    users, personal = employees(199)
+    index = SearchIndex()
+    index.replace(build_changes(users, personal, [], []))
+
+    assert len(index) == 199
+    assert_token_list_consistent(index)
+    for i in range(199):
+        assert f"67{i:03d}" in {hit["id"] for hit in index.search(f"family{i}", limit=50)}
+        assert index.search(f"nick{i}", limit=1)[0]["id"] == f"67{i:03d}"
+
+def test_full_build_tolerates_split_employee_upserts():
+    """Users and PersonalInfo upserted separately re-link each doc during the bulk build."""
+    users, personal = employees(30)
+    changes = [("upsert", EMPLOYEE, u.emp_id, {"emp_id": u.emp_id, "email": u.email}) for u in users]
+    changes += [("upsert", EMPLOYEE, p.emp_id, {f: getattr(p, f) for f in PERSONAL_FIELDS}) for p in personal]
+    index = SearchIndex()
+    index.replace(changes)
+
+    assert_token_list_consistent(index)
+    assert {hit["id"] for hit in index.search("user1", limit=50)} >= {"67001", "67010"}
+
+def test_incremental_upsert_renames_employee():
+    users, personal = employees(20)
+    index = SearchIndex()
+    index.replace(build_changes(users, personal, [], []))
+
+    index.apply([("upsert", EMPLOYEE, "67003", {"eng_name": "Zephyr Renamed", "eng_nickname": "zed"})])
+
+    assert_token_list_consistent(index)
+    assert index.search("zeph")[0]["id"] == "67003"
+    assert index.search("ze")[0]["id"] == "67003"
+    assert "67003" not in {hit["id"] for hit in index.search("family3")}
+    assert "family3" not in index._tokens
+    assert index.search("user3@example.com")[0]["id"] == "67003"
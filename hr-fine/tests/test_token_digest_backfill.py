@@ -0,0 +1,23 @@
+from database.token_digest_backfill import backfill_token_digests
+from models.auth_model import RefreshToken, Users
+from services import auth_service
+from utils.jwt_util import issue_session_tokens, token_digest
+
+def test_backfilled_sessions_refresh_and_log_out(db):
+    user = Users(emp_id="69101", email="legacy@example.com", password="x")
+    db.add(user)
+    db.commit()
+    tokens = issue_session_tokens(user, db)
+    ## a row written before the digest columns existed
+    db.query(RefreshToken).update({"access_token_digest": None, "refresh_token_digest": None, "session_id": None})
+    db.add(RefreshToken(user_id=user.id, access_token="repeat", refresh_token="repeat-refresh", status=False))
+    db.add(RefreshToken(user_id=user.id, access_token="repeat", refresh_token="repeat-refresh", status=True))
+    db.commit()
+
+    assert backfill_token_digests(db, batch_size=2) == 2
+    assert backfill_token_digests(db) == 0
+    older, newest = db.query(RefreshToken).filter(RefreshToken.access_token == "repeat").order_by(RefreshToken.id)
+    assert (older.access_token_digest, newest.access_token_digest) == (None, token_digest("repeat"))
+
+    refreshed = auth_service.access_refresh_token(tokens["refresh_token"], db)
+    assert refreshed["refresh_token"] == tokens["refresh_token"]
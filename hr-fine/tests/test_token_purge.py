@@ -0,0 +1,40 @@
+import asyncio
+from datetime import datetime, timedelta
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from database.db import Base
+from models.auth_model import RefreshToken
+from utils import token_purge
+
+def test_purge_removes_expired_and_long_revoked_tokens(tmp_path, monkeypatch):
+    monkeypatch.setattr(token_purge, "TOKEN_PURGE_BATCH_SIZE", 2)
+    now = datetime.now()
+    tokens = {
+        "expired": dict(status=True, created_date=now - timedelta(days=8)),
+        "expired revoked": dict(status=False, created_date=now - timedelta(days=8), revoked_date=now - timedelta(days=7)),
+        "revoked long ago": dict(status=False, created_date=now - timedelta(days=1), revoked_date=now - timedelta(hours=2)),
+        "revoked just now": dict(status=False, created_date=now - timedelta(days=1), revoked_date=now),
+        "active": dict(status=True, created_date=now),
+    }
+
+    async def run():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'purge.db'}")
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        monkeypatch.setattr(token_purge, "AsyncSessionLocal", async_sessionmaker(engine))
+        async with token_purge.AsyncSessionLocal() as session:
+            for name, values in tokens.items():
+                for _ in range(3):
+                    session.add(RefreshToken(user_id=1, access_token=name, refresh_token=name, **values))
+            await session.commit()
+
+        purged = await token_purge.purge_expired_tokens()
+        async with token_purge.AsyncSessionLocal() as session:
+            remaining = set((await session.execute(select(RefreshToken.access_token))).scalars())
+        await engine.dispose()
+        return purged, remaining
+
+    purged, remaining = asyncio.run(run())
+    assert purged == 9
+    assert remaining == {"revoked just now", "active"}
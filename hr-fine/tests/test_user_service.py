@@ -0,0 +1,135 @@
+from datetime import date
+import json
+import pytest
+from fastapi import HTTPException
+
+from database.query_stats import assert_max_queries
+
+from models.auth_model import Users
+from models.user_model import DeductionInfo, HiringInfo, PersonalInfo, ReportingLine
+from schemas.user_schema import UpdateEmployeeRecord
+from services import user_service
+from services.user_service import (
+    create_hiring_info, create_personal_info, build_employee_dashboard_page, employee_dashboard_query, encode_dashboard_cursor, get_employee_details_by_id,
+    get_employee_details_json, patch_employee_record, process_all_sections,
+)
+from utils import employee_cache
+from utils.employee_cache import EmployeeDetailCache
+
+PERSONAL_INFO = {
+    "nation_id": "1100000000001",
+    "thai_name": "สมชาย ใจดี",
+    "eng_name": "Somchai Jaidee",
+    "thai_nickname": "ชาย",
+    "eng_nickname": "Chai",
+    "gender": "male",
+    "nation": "Thai",
+}
+
+HIRING_INFO = {
+    "start_date": date(2024, 1, 1),
+    "working_status": "active",
+    "prodation_date": date(2024, 4, 1),
+    "terminate_date": date(2099, 1, 1),
+    "emp_type": "full-time",
+    "working_location": "Bangkok",
+    "contract_type": "permanent",
+    "department": 1,
+    "position": 1,
+    "manager": "6701000",
+}
+
+@pytest.fixture
+def employee(db):
+    db.add(Users(emp_id="6701001", password="x", email="somchai@example.com"))
+    db.add(PersonalInfo(emp_id="6701001", date_birth=date(1990, 1, 2), **PERSONAL_INFO))
+    db.commit()
+    return "6701001"
+
+def test_patch_updates_date_fields(db, employee):
+    details = patch_employee_record(db, employee, UpdateEmployeeRecord(
+        personal_info={"date_birth": "1991-03-04"},
+        deduction_info={"deduct_social_security": True, "has_social_security": True, "deduct_SLF_IC": False, "enroll_date": "2024-05-06"},
+    ))
+
+    assert details.personal_info.date_birth == "1991-03-04"
+    assert details.deduction_info.enroll_date == "2024-05-06"
+    db.expire_all()
+    assert db.query(PersonalInfo.date_birth).filter_by(emp_id=employee).scalar() == date(1991, 3, 4)
+    assert db.query(DeductionInfo.enroll_date).filter_by(emp_id=employee).scalar() == date(2024, 5, 6)
+    assert get_employee_details_by_id(db, employee) == details
+
+def test_patch_rejects_invalid_date(db, employee):
+    with pytest.raises(HTTPException) as error:
+        patch_employee_record(db, employee, UpdateEmployeeRecord(personal_info={"date_birth": "04/03/1991"}))
+
+    assert error.value.status_code == 400
+    db.expire_all()
+    assert db.query(PersonalInfo.date_birth).filter_by(emp_id=employee).scalar() == date(1990, 1, 2)
+
+def submitted_sections(personal_info):
+    return [
+        {"data_dict": personal_info, "model_cls": PersonalInfo, "creation_func": create_personal_info, "model_name": "Personal info"},
+        {"data_dict": dict(HIRING_INFO), "model_cls": HiringInfo, "creation_func": create_hiring_info, "model_name": "Hiring info"},
+    ]
+
+def test_submit_all_sets_reporting_line(db):
+    db.add(Users(emp_id="6701002", password="x", email="somsri@example.com"))
+    db.commit()
+
+    responses = process_all_sections(db, "6701002", submitted_sections(dict(PERSONAL_INFO)))
+
+    assert {response["status"] for response in responses.values()} == {"success"}
+    assert db.query(ReportingLine.ancestor).filter_by(descendant="6701002", depth=1).scalar() == "6701000"
+
+def test_submit_all_reports_constraint_violation_as_400(db):
+    db.add(Users(emp_id="6701002", password="x", email="somsri@example.com"))
+    db.commit()
+
+    with pytest.raises(HTTPException) as error:
+        process_all_sections(db, "6701002", submitted_sections(dict(PERSONAL_INFO, nation_id=None)))
+
+    assert error.value.status_code == 400
+    assert db.query(HiringInfo).count() == 0
+    assert db.query(ReportingLine).count() == 0
+
+@pytest.mark.parametrize("order", ["asc", "desc"])
+def test_employee_dashboard_pages_by_emp_id(db, order):
+    emp_ids = [f"67{i:03d}" for i in range(1, 13)]
+    for emp_id in emp_ids:
+        db.add(Users(emp_id=emp_id, password="x", email=f"{emp_id}@example.com"))
+    db.commit()
+
+    served, cursor = [], None
+    while True:
+        rows = db.execute(employee_dashboard_query(order=order, cursor=cursor, limit=5)).all()
+        page = build_employee_dashboard_page(rows, order, limit=5)
+        served += [item.emp_id for item in page.items]
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+
+    assert served == sorted(emp_ids, reverse=order == "desc")
+    with pytest.raises(HTTPException):
+        employee_dashboard_query(order="desc" if order == "asc" else "asc", cursor=encode_dashboard_cursor(order, "67005"))
+
+def test_employee_details_cache_hits_until_a_commit_touches_the_employee(db, employee, monkeypatch):
+    cache = EmployeeDetailCache()
+    monkeypatch.setattr(user_service, "employee_cache", cache)
+    monkeypatch.setattr(employee_cache, "employee_cache", cache)
+
+    payload = get_employee_details_json(db, employee)
+    with assert_max_queries(0):
+        assert get_employee_details_json(db, employee) is payload
+
+    personal = db.query(PersonalInfo).filter_by(emp_id=employee).one()
+    personal.eng_name = "Somchai Changed"
+    db.flush()
+    db.rollback()
+    assert get_employee_details_json(db, employee) is payload
+
+    personal = db.query(PersonalInfo).filter_by(emp_id=employee).one()
+    personal.eng_name = "Somchai Changed"
+    db.commit()
+    assert json.loads(get_employee_details_json(db, employee))["personal_info"]["eng_name"] == "Somchai Changed"
+    assert (cache.hits, cache.misses, cache.invalidations) == (2, 2, 1)
@@ -0,0 +1,127 @@
+"""
+Background delivery for the email_outbox table.
+
+Delivery runs in three steps so no row lock or transaction is held while talking to SMTP:
+claim a batch (SELECT ... FOR UPDATE SKIP LOCKED, mark it `sending`, commit), send it over
+a single SMTP connection, then record each outcome in a second short transaction. A claim
+older than EMAIL_CLAIM_TIMEOUT_SECONDS (the worker died mid-batch) is returned to `pending`.
+Failed sends are retried with exponential backoff until EMAIL_MAX_ATTEMPTS.
+"""
+import asyncio, logging, os
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from sqlalchemy import func, update
+
+from database.db import SessionLocal
+from models.email_model import EmailOutbox
+from utils.email_util import build_message, smtp_connection
+
+EMAIL_OUTBOX_POLL_SECONDS = int(os.getenv("EMAIL_OUTBOX_POLL_SECONDS", 5))
+EMAIL_OUTBOX_BATCH_SIZE = int(os.getenv("EMAIL_OUTBOX_BATCH_SIZE", 50))
+EMAIL_MAX_ATTEMPTS = int(os.getenv("EMAIL_MAX_ATTEMPTS", 5))
+EMAIL_RETRY_BASE_SECONDS = int(os.getenv("EMAIL_RETRY_BASE_SECONDS", 30))
+EMAIL_CLAIM_TIMEOUT_SECONDS = int(os.getenv("EMAIL_CLAIM_TIMEOUT_SECONDS", 600))
+
+def _mark_failed_attempt(email: EmailOutbox, error: Exception, now: datetime):
+    email.attempts += 1
+    email.last_error = str(error)[:500]
+    if email.attempts >= EMAIL_MAX_ATTEMPTS:
+        email.status = "failed"
+        ## never going out: don't keep the temporary password around
+        email.body = None
+    else:
+        email.status = "pending"
+        email.next_attempt_at = now + timedelta(seconds=EMAIL_RETRY_BASE_SECONDS * 2 ** (email.attempts - 1))
+
+def claim_pending_emails(now: datetime, claimed_at: datetime) -> List[dict]:
+    """Marks one batch of due emails `sending` and commits, so their row locks are released before SMTP."""
+    with SessionLocal() as db:
+        db.execute(
+            update(EmailOutbox)
+            .where(EmailOutbox.status == "sending", EmailOutbox.claimed_date < now - timedelta(seconds=EMAIL_CLAIM_TIMEOUT_SECONDS))
+            .values(status="pending", claimed_date=None)
+        )
+        batch = (
+            db.query(EmailOutbox)
+            .filter(EmailOutbox.status == "pending", EmailOutbox.next_attempt_at <= now)
+            .order_by(EmailOutbox.id)
+            .limit(EMAIL_OUTBOX_BATCH_SIZE)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+        claimed = []
+        for email in batch:
+            email.status, email.claimed_date = "sending", claimed_at
+            claimed.append({"id": email.id, "to_email": email.to_email, "subject": email.subject, "body": email.body})
+        db.commit()
+    return claimed
+
+def send_claimed_emails(claimed: List[dict]) -> Dict[int, Optional[Exception]]:
+    """Sends each claimed email; returns id -> None when sent, or the error."""
+    outcomes = {}
+    try:
+        with smtp_connection() as server:
+            for email in claimed:
+                try:
+                    server.send_message(build_message(email["to_email"], email["subject"], email["body"]))
+                    outcomes[email["id"]] = None
+                except Exception as e:
+                    outcomes[email["id"]] = e
+    except Exception as e:
+        ## Could not connect or log in: every mail not yet tried counts one attempt.
+        logging.error(f"SMTP connection failed: {e}")
+        for email in claimed:
+            outcomes.setdefault(email["id"], e)
+    return outcomes
+
+def record_delivery_outcomes(outcomes: Dict[int, Optional[Exception]], claimed_at: datetime) -> int:
+    delivered = 0
+    with SessionLocal() as db:
+        emails = (
+            db.query(EmailOutbox)
+            ## a claim that timed out and was taken over by another worker is theirs to record
+            .filter(EmailOutbox.id.in_(outcomes), EmailOutbox.status == "sending", EmailOutbox.claimed_date == claimed_at)
+            .all()
+        )
+        for email in emails:
+            error = outcomes[email.id]
+            email.claimed_date = None
+            if error is not None:
+                _mark_failed_attempt(email, error, claimed_at)
+                continue
+            email.status = "sent"
+            email.attempts += 1
+            email.sent_date = datetime.now()
+            email.body = None
+            delivered += 1
+        db.commit()
+    return delivered
+
+def deliver_pending_emails() -> int:
+    """Sends one batch of due emails; returns how many were delivered."""
+    now = datetime.now()
+    ## whole seconds: DATETIME drops the fraction, and record_delivery_outcomes matches on it
+    claimed_at = now.replace(microsecond=0)
+    claimed = claim_pending_emails(now, claimed_at)
+    if not claimed:
+        return 0
+    return record_delivery_outcomes(send_claimed_emails(claimed), claimed_at)
+
+def get_outbox_status() -> dict:
+    with SessionLocal() as db:
+        counts = dict(
+            db.query(EmailOutbox.status, func.count(EmailOutbox.id))
+            .group_by(EmailOutbox.status)
+            .all()
+        )
+    return {status: counts.get(status, 0) for status in ("pending", "sending", "sent", "failed")}
+
+async def deliver_emails_periodically():
+    while True:
+        try:
+            delivered = await asyncio.to_thread(deliver_pending_emails)
+            if delivered:
+                logging.info(f"Delivered {delivered} queued emails")
+        except Exception as e:
+            logging.error(f"Email outbox delivery failed: {e}")
+        await asyncio.sleep(EMAIL_OUTBOX_POLL_SECONDS)
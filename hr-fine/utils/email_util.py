@@ -1,4 +1,5 @@
 import smtplib
+from contextlib import contextmanager
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from dotenv import load_dotenv
@@ -6,23 +7,34 @@ import os
 
 load_dotenv()
 
-def send_email(to_email: str, subject:str, body: str):
+def build_message(to_email: str, subject: str, body: str) -> MIMEMultipart:
+    message = MIMEMultipart()
+    message["From"] = os.getenv("EMAIL_SENDER")
+    message["To"] = to_email
+    message["Subject"] = subject
+    message.attach(MIMEText(body, "plain"))
+    return message
+
+@contextmanager
+def smtp_connection():
+    """One logged-in SMTP connection, reused for every message sent inside the block."""
     smtp_server = os.getenv("SMTP_SERVER")
     smtp_port = int(os.getenv("SMTP_PORT"))
     sender_email = os.getenv("EMAIL_SENDER")
     sender_password = os.getenv("EMAIL_PASSWORD")
+    use_tls = os.getenv("SMTP_STARTTLS", "true").lower() == "true"
 
-    try: 
-        message = MIMEMultipart()
-        message["From"] = sender_email
-        message["To"] = to_email
-        message["Subject"] = subject
-        message.attach(MIMEText(body, "plain"))
-
-        with smtplib.SMTP(smtp_server, smtp_port) as server:
+    with smtplib.SMTP(smtp_server, smtp_port) as server:
+        if use_tls:
             server.starttls()
+        if sender_password:
             server.login(sender_email, sender_password)
-            server.send_message(message)
+        yield server
+
+def send_email(to_email: str, subject:str, body: str):
+    try: 
+        with smtp_connection() as server:
+            server.send_message(build_message(to_email, subject, body))
 
         print(f"EMail send to {to_email}")
     except Exception as e:
@@ -0,0 +1,92 @@
+"""
+Worker-local LRU cache of serialized EmployeeDetails, keyed by emp_id.
+
+Entries are dropped when a commit touches the user or any of its sections (collected
+from session flushes, so every update path is covered) and expire after
+EMPLOYEE_CACHE_TTL_SECONDS, which bounds how long another worker's edit can go unseen.
+"""
+import os, threading, time
+from collections import OrderedDict
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from models.auth_model import Users
+from models.user_model import AddressInfo, ContactInfo, DeductionInfo, HiringInfo, PaymentInfo, PersonalInfo, RegistrationAddress
+
+EMPLOYEE_CACHE_SIZE = int(os.getenv("EMPLOYEE_CACHE_SIZE", 5000))
+EMPLOYEE_CACHE_TTL_SECONDS = int(os.getenv("EMPLOYEE_CACHE_TTL_SECONDS", 60))
+
+EMPLOYEE_MODELS = (Users, PersonalInfo, AddressInfo, RegistrationAddress, ContactInfo, HiringInfo, PaymentInfo, DeductionInfo)
+
+class EmployeeDetailCache:
+    def __init__(self, max_size: int = EMPLOYEE_CACHE_SIZE, ttl: int = EMPLOYEE_CACHE_TTL_SECONDS):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        ## bumped on every invalidation so a read that raced a commit is not cached
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, emp_id: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(emp_id)
+            if entry is None or entry[1] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[emp_id]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(emp_id)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, emp_id: str, payload: bytes, generation: int):
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[emp_id] = (payload, time.monotonic() + self.ttl)
+            self._entries.move_to_end(emp_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, *emp_ids: str):
+        with self._lock:
+            self.generation += 1
+            for emp_id in emp_ids:
+                if self._entries.pop(emp_id, None) is not None:
+                    self.invalidations += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else None,
+                "invalidations": self.invalidations,
+            }
+
+employee_cache = EmployeeDetailCache()
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_employees(session, flush_context):
+    changed = session.info.setdefault("employee_cache_changes", set())
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, EMPLOYEE_MODELS) and obj.emp_id:
+            changed.add(obj.emp_id)
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_employees(session):
+    changed = session.info.pop("employee_cache_changes", None)
+    if changed:
+        employee_cache.invalidate(*changed)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changed_employees(session):
+    session.info.pop("employee_cache_changes", None)
@@ -1,8 +1,11 @@
-import os, jwt
+import os, jwt, threading, time
+from collections import OrderedDict
 from fastapi import HTTPException, Request
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jwt import InvalidTokenError
 from dotenv import load_dotenv
+from utils.jwt_util import token_digest
+from utils.revocation import revoked_tokens
 
 load_dotenv()
 
@@ -11,41 +14,84 @@ REFRESH_TOKEN_EXPIRE_MINUTES = 60 * 24 * 7
 ALGORITHM = os.getenv("ALGORITHM")
 JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY")
 JWT_REFRESH_SECRET_KEY = os.getenv("JWT_REFRESH_SECRET_KEY")
+JWT_CACHE_SIZE = int(os.getenv("JWT_CACHE_SIZE", 10000))
+
+class TokenClaims(dict):
+    """Verified JWT payload; `token` keeps the raw credential for session lookups."""
+
+    def __init__(self, token: str, payload: dict):
+        super().__init__(payload)
+        self.token = token
+
+## token -> (payload, exp). LRU-bounded; an entry is dropped once its token expires.
+_verified_tokens: "OrderedDict[str, tuple]" = OrderedDict()
+_verified_tokens_lock = threading.Lock()
+
+def _get_cached_payload(jwttoken: str):
+    with _verified_tokens_lock:
+        entry = _verified_tokens.get(jwttoken)
+        if entry is None:
+            return None
+        payload, exp = entry
+        if exp is not None and exp <= time.time():
+            del _verified_tokens[jwttoken]
+            return None
+        _verified_tokens.move_to_end(jwttoken)
+        return payload
+
+def _cache_payload(jwttoken: str, payload: dict):
+    with _verified_tokens_lock:
+        _verified_tokens[jwttoken] = (payload, payload.get("exp"))
+        _verified_tokens.move_to_end(jwttoken)
+        while len(_verified_tokens) > JWT_CACHE_SIZE:
+            _verified_tokens.popitem(last=False)
 
 def decode_jwt(jwttoken: str):
+    payload = _get_cached_payload(jwttoken)
+    if payload is not None:
+        return payload
     try:
         #Decode & Verify Token
         payload = jwt.decode(jwttoken, JWT_SECRET_KEY, ALGORITHM)
-        return payload
     except InvalidTokenError:
         return None
+    _cache_payload(jwttoken, payload)
+    return payload
+
+def forget_token(jwttoken: str):
+    with _verified_tokens_lock:
+        _verified_tokens.pop(jwttoken, None)
     
 class JWTBearer(HTTPBearer):
     def __init__(self, auto_error: bool = True):
         super(JWTBearer, self).__init__(auto_error=auto_error)
 
-    async def __call__(self, request: Request):
+    async def __call__(self, request: Request) -> TokenClaims:
+       claims = getattr(request.state, "claims", None)
+       if claims is not None:
+           return claims
+
        credentials: HTTPAuthorizationCredentials = await super(JWTBearer, self).__call__(request)
        if credentials:
            if credentials.scheme != "Bearer":
                raise HTTPException(status_code=403, detail="Invalid authenticate schema.")
-           if not self.verify_jwt(credentials.credentials):
+           payload = self.verify_jwt(credentials.credentials)
+           if not payload:
                raise HTTPException(status_code=403, detail="Invalid token or expired token.")
-           
-           return credentials.credentials
+           if payload.get("sid") in revoked_tokens or token_digest(credentials.credentials) in revoked_tokens:
+               raise HTTPException(status_code=403, detail="Token has been revoked.")
+
+           request.state.claims = TokenClaims(credentials.credentials, payload)
+           return request.state.claims
        else:
            raise HTTPException(status_code=403, detail="Invalid authorization code.")
        
-    def verify_jwt(self, jwtoken: str) -> bool:
-        is_token_valid: bool = False
-
+    def verify_jwt(self, jwtoken: str):
         try: 
             payload = decode_jwt(jwtoken)
         except Exception as e:
             payload = None
             print(f"Error decoding JWT: {e}")
-        if payload:
-            is_token_valid =True
-        return is_token_valid
+        return payload
     
 jwt_bearer = JWTBearer
\ No newline at end of file
@@ -2,14 +2,14 @@ from functools import wraps
 from fastapi import Depends
 from sqlalchemy.orm import Session
 from database.db import get_session
-import os, jwt
-from passlib.context import CryptContext
+import os, jwt, hashlib, uuid
 from datetime import datetime, timedelta, date, timezone
 from typing import Union, Any
 from dotenv import load_dotenv
 
 from models import auth_model
 from models.auth_model import Users  
+from utils.password_hasher import check_password, hash_password
 
 load_dotenv()
 
@@ -20,15 +20,17 @@ ALGORITHM = os.getenv("ALGORITHM")
 JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY")
 JWT_REFRESH_SECRET_KEY = os.getenv("JWT_REFRESH_SECRET_KEY")
 
-password_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 def get_hashed_password(password: str) -> str:
-    return password_context.hash(password)
+    return hash_password(password)
 
 def verify_password(password: str, hashed_pass: str) -> bool:
-    return password_context.verify(password, hashed_pass)
+    return check_password(password, hashed_pass)
+
+def token_digest(token: str) -> str:
+    """Fixed-width SHA-256 hex of a JWT, used as the indexed lookup key in refresh_token."""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
 
-def create_access_token(subject: Union[str, Any], emp_id: str, db: Session, expires_delta: int = None) -> str:
+def create_access_token(subject: Union[str, Any], emp_id: str, db: Session, expires_delta: int = None, session_id: str = None) -> str:
     """
     Creates an access token and includes reset_status from the database.
     """
@@ -48,36 +50,51 @@ def create_access_token(subject: Union[str, Any], emp_id: str, db: Session, expi
         "exp": expires_delta,
         "sub": str(subject),
         "emp_id": emp_id,
-        "reset_status": reset_status 
+        "reset_status": reset_status,
+        "jti": uuid.uuid4().hex,
     }
+    if session_id:
+        to_encode["sid"] = session_id
 
     encode_jwt = jwt.encode(to_encode, JWT_SECRET_KEY, ALGORITHM)
     return encode_jwt
 
-def create_refresh_token(subject: Union[str, Any], emp_id: str, db: Session, expires_delta: int = None) -> str:
-    if expires_delta is not None:
-        expires_delta = datetime.now(timezone.utc) + expires_delta
-    else:
-        expires_delta = datetime.now(timezone.utc) + timedelta(minutes=REFRESH_TOKEN_EXPIRE_MINUTES)
-
-    user = db.query(Users).filter(Users.emp_id == emp_id).first()
-    if not user:
-        raise ValueError("User not found in database")
-
-    reset_status = user.reset_status
-
-    to_encode = {"exp": expires_delta, "sub": str(subject), "emp_id": emp_id, "reset_status": reset_status}
-    encode_jwt = jwt.encode(to_encode, JWT_REFRESH_SECRET_KEY, ALGORITHM)
-
-    return encode_jwt
+def issue_session_tokens(user: Users, db: Session) -> dict:
+    """
+    Mints the access/refresh pair for an already-loaded user and stores the session row.
+    No Users re-query and no refresh SELECT: one INSERT on top of the caller's lookup.
+    """
+    now = datetime.now(timezone.utc)
+    session_id = uuid.uuid4().hex
+    claims = {"sub": str(user.id), "emp_id": user.emp_id, "reset_status": user.reset_status, "sid": session_id}
+
+    ## jti keeps two logins in the same second from minting identical tokens (and digests).
+    access = jwt.encode({**claims, "jti": uuid.uuid4().hex, "exp": now + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)}, JWT_SECRET_KEY, ALGORITHM)
+    refresh = jwt.encode({**claims, "jti": uuid.uuid4().hex, "exp": now + timedelta(minutes=REFRESH_TOKEN_EXPIRE_MINUTES)}, JWT_REFRESH_SECRET_KEY, ALGORITHM)
+
+    db.add(auth_model.RefreshToken(
+        user_id=user.id,
+        access_token=access,
+        refresh_token=refresh,
+        access_token_digest=token_digest(access),
+        refresh_token_digest=token_digest(refresh),
+        session_id=session_id,
+        status=True,
+    ))
+    db.commit()
+
+    return {
+        "access_token": access,
+        "refresh_token": refresh
+    }
 
 def token_required(func):
     @wraps(func)
     def wrapper(*args, **kwargs):
-        payload = jwt.decode(kwargs['dependencies'], JWT_SECRET_KEY, ALGORITHM)
-        username = payload['sub']
-        data = kwargs['session'].query(auth_model.RefreshToken).filter_by(username=username, access_token=kwargs['dependencies'], status=True).first()
-        if data: 
+        from utils.revocation import revoked_tokens
+
+        jwt.decode(kwargs['dependencies'], JWT_SECRET_KEY, ALGORITHM)
+        if token_digest(kwargs['dependencies']) not in revoked_tokens: 
             return func(kwargs['dependencies'], kwargs['session'])
         else:
             return{'msg': "Token Blocked."}
@@ -0,0 +1,83 @@
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import List, Optional
+from decouple import config
+from fastapi import HTTPException
+from passlib.context import CryptContext
+
+## bcrypt costs ~100-300 ms of CPU per call, so it runs on a small dedicated pool
+## instead of inline on the request thread. "process" sidesteps the GIL entirely.
+HASH_EXECUTOR = config("PASSWORD_HASH_EXECUTOR", default="thread")
+HASH_WORKERS = config("PASSWORD_HASH_WORKERS", default=2, cast=int)
+## Threads Starlette runs sync routes on; set on the anyio limiter at startup (app.py).
+THREADPOOL_SIZE = config("THREADPOOL_SIZE", default=40, cast=int)
+## Running + queued hash jobs allowed before callers are turned away with 503. Every
+## pending job parks a request thread on .result(), so this is kept to a quarter of
+## the threadpool and a login burst can't starve the other sync routes.
+HASH_MAX_PENDING = min(
+    config("PASSWORD_HASH_MAX_PENDING", default=THREADPOOL_SIZE // 4, cast=int),
+    max(THREADPOOL_SIZE // 4, HASH_WORKERS),
+)
+
+password_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+_executor: Optional[Executor] = None
+_executor_lock = threading.Lock()
+_pending = threading.BoundedSemaphore(HASH_MAX_PENDING)
+
+def _hash(password: str) -> str:
+    return password_context.hash(password)
+
+def _verify(password: str, hashed_pass: str) -> bool:
+    return password_context.verify(password, hashed_pass)
+
+def get_executor() -> Executor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                if HASH_EXECUTOR == "process":
+                    _executor = ProcessPoolExecutor(max_workers=HASH_WORKERS)
+                else:
+                    _executor = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix="bcrypt")
+    return _executor
+
+def shutdown_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+def submit(fn, *args):
+    """Queues a hash job, or raises 503 when the pool already has HASH_MAX_PENDING jobs."""
+    if not _pending.acquire(blocking=False):
+        raise HTTPException(
+            status_code=503,
+            detail="Server is busy, please try again shortly.",
+            headers={"Retry-After": "1"},
+        )
+    try:
+        future = get_executor().submit(fn, *args)
+    except Exception:
+        _pending.release()
+        raise
+    future.add_done_callback(lambda _: _pending.release())
+    return future
+
+def hash_password(password: str) -> str:
+    return submit(_hash, password).result()
+
+def check_password(password: str, hashed_pass: str) -> bool:
+    return submit(_verify, password, hashed_pass).result()
+
+def hash_passwords(passwords: List[str]) -> List[str]:
+    """
+    Hashes a batch in parallel, HASH_WORKERS at a time, so a bulk import
+    never holds more queue slots than the pool can actually run.
+    """
+    hashed = []
+    for i in range(0, len(passwords), HASH_WORKERS):
+        futures = [submit(_hash, password) for password in passwords[i:i + HASH_WORKERS]]
+        hashed.extend(future.result() for future in futures)
+    return hashed
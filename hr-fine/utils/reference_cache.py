@@ -0,0 +1,74 @@
+"""
+Worker-local cache for the /optional/* reference tables (companies, departments, ...).
+
+These tables change a few times a year, so each lookup is loaded once and served from
+memory until the matching add_*/edit_* call invalidates it on this worker, or until
+REFERENCE_CACHE_TTL_SECONDS passes, which bounds how long a change made on another
+worker can go unseen. Every invalidation bumps `version`.
+"""
+import hashlib, json, os, threading, time
+from typing import Callable, Dict, Optional, Tuple
+from fastapi.encoders import jsonable_encoder
+
+REFERENCE_CACHE_TTL_SECONDS = int(os.getenv("REFERENCE_CACHE_TTL_SECONDS", 300))
+
+class ReferenceDataCache:
+    def __init__(self, ttl: int = REFERENCE_CACHE_TTL_SECONDS):
+        self.ttl = ttl
+        self.version = 0
+        self._values: Dict[str, Tuple[object, float]] = {}
+        self._bundle: Optional[Tuple[int, float, bytes, str]] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, name: str, loader: Callable[[], object]):
+        with self._lock:
+            entry = self._values.get(name)
+            if entry is not None and entry[1] > time.monotonic():
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            version = self.version
+        value = loader()
+        with self._lock:
+            ## a write that landed while we were loading wins; serve this value but don't keep it
+            if version == self.version:
+                self._values[name] = (value, time.monotonic() + self.ttl)
+        return value
+
+    def bundle(self, loaders: Dict[str, Callable[[], object]]) -> Tuple[bytes, str]:
+        """All lookups as one JSON document plus a content-derived ETag, identical across workers."""
+        with self._lock:
+            if self._bundle is not None and self._bundle[0] == self.version and self._bundle[1] > time.monotonic():
+                self.hits += 1
+                return self._bundle[2], self._bundle[3]
+            version = self.version
+        content = json.dumps(
+            {name: jsonable_encoder(self.get(name, loader)) for name, loader in loaders.items()},
+            ensure_ascii=False, sort_keys=True, separators=(",", ":"),
+        ).encode()
+        etag = f'"{hashlib.sha256(content).hexdigest()[:32]}"'
+        with self._lock:
+            if version == self.version:
+                self._bundle = (version, time.monotonic() + self.ttl, content, etag)
+        return content, etag
+
+    def invalidate(self, *names: str):
+        with self._lock:
+            self.version += 1
+            for name in names:
+                self._values.pop(name, None)
+            self._bundle = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "version": self.version,
+                "cached": sorted(self._values),
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+reference_cache = ReferenceDataCache()
@@ -0,0 +1,67 @@
+"""
+Worker-local set of revoked sessions: their session ids (the "sid" claim, which covers
+every access token minted for the session) plus the last access-token digest, for
+tokens issued before session ids existed.
+
+Each worker loads the set at startup and reloads it every REVOCATION_REFRESH_SECONDS.
+A logout is visible immediately on the worker that handled it; other workers pick it
+up on their next reload, so a logged-out token can keep working elsewhere for at most
+REVOCATION_REFRESH_SECONDS.
+"""
+import asyncio, logging, os, threading
+from datetime import datetime, timedelta
+from typing import Iterable
+from sqlalchemy import and_, or_, select
+
+from database.db import AsyncSessionLocal
+from models.auth_model import RefreshToken
+from utils.jwt_util import ACCESS_TOKEN_EXPIRE_MINUTES, REFRESH_TOKEN_EXPIRE_MINUTES
+
+REVOCATION_REFRESH_SECONDS = int(os.getenv("REVOCATION_REFRESH_SECONDS", 30))
+
+class RevocationSet:
+    def __init__(self):
+        self._digests = set()
+        self._lock = threading.Lock()
+
+    def add(self, digest: str):
+        with self._lock:
+            self._digests.add(digest)
+
+    def replace(self, digests: Iterable[str]):
+        new_digests = set(digests)
+        with self._lock:
+            self._digests = new_digests
+
+    def __contains__(self, digest: str) -> bool:
+        return digest in self._digests
+
+    def __len__(self) -> int:
+        return len(self._digests)
+
+revoked_tokens = RevocationSet()
+
+async def load_revocations():
+    """Reloads every revoked session that may still hold a live access token."""
+    now = datetime.now()
+    access_cutoff = now - timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    session_cutoff = now - timedelta(minutes=REFRESH_TOKEN_EXPIRE_MINUTES)
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            select(RefreshToken.access_token_digest, RefreshToken.session_id).filter(
+                RefreshToken.status == False,
+                or_(
+                    RefreshToken.revoked_date >= access_cutoff,
+                    and_(RefreshToken.revoked_date.is_(None), RefreshToken.created_date >= session_cutoff),
+                ),
+            )
+        )
+        revoked_tokens.replace(value for row in result for value in row if value)
+
+async def refresh_revocations_periodically():
+    while True:
+        await asyncio.sleep(REVOCATION_REFRESH_SECONDS)
+        try:
+            await load_revocations()
+        except Exception as e:
+            logging.error(f"Failed to reload token revocations: {e}")
@@ -0,0 +1,289 @@
+"""
+Worker-local typeahead index over employees, projects and clients.
+
+Every indexed field is posted under its exact value, its tokens (kept sorted, for prefix
+ranges) and its trigrams (for substring and fuzzy matches). The index is built at startup,
+kept current from committed ORM changes through session events, and rebuilt every
+SEARCH_INDEX_REBUILD_SECONDS so writes made on other workers show up there too.
+"""
+import asyncio, bisect, heapq, logging, os, re, threading, unicodedata
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from database.db import AsyncSessionLocal
+from models.auth_model import Users
+from models.client_model import Client
+from models.project_model import ProjectDetails
+from models.user_model import PersonalInfo
+
+SEARCH_INDEX_REBUILD_SECONDS = int(os.getenv("SEARCH_INDEX_REBUILD_SECONDS", 300))
+SEARCH_MAX_LIMIT = 50
+SEARCH_CANDIDATES = int(os.getenv("SEARCH_CANDIDATES", 500))
+
+EMPLOYEE, PROJECT, CLIENT = "employee", "project", "client"
+USER_FIELDS = ("emp_id", "email")
+PERSONAL_FIELDS = ("thai_name", "eng_name", "thai_nickname", "eng_nickname")
+PROJECT_FIELDS = ("project_code", "project_name", "project_contract_no")
+CLIENT_FIELDS = ("client_name", "client_code")
+
+_TOKEN_SPLIT = re.compile(r"[\s@._\-/,()]+")
+
+def normalize(text: Optional[str]) -> str:
+    return unicodedata.normalize("NFKC", text or "").casefold().strip()
+
+def trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+@dataclass
+class SearchDoc:
+    kind: str
+    id: str
+    title: str
+    subtitle: str
+    fields: Tuple[str, ...]
+    tokens: Tuple[str, ...]
+
+    @property
+    def key(self) -> Tuple[str, str]:
+        return (self.kind, self.id)
+
+def make_doc(kind: str, doc_id, title: str, subtitle: str, values: Iterable[Optional[str]]) -> SearchDoc:
+    fields = tuple(dict.fromkeys(f for f in (normalize(v) for v in values) if f))
+    tokens = tuple(dict.fromkeys(t for f in fields for t in _TOKEN_SPLIT.split(f) if t))
+    return SearchDoc(kind, str(doc_id), title, subtitle, fields, tokens)
+
+def employee_doc(emp_id: str, parts: dict) -> SearchDoc:
+    title = parts.get("eng_name") or parts.get("thai_name") or emp_id
+    subtitle = " · ".join(v for v in (emp_id, parts.get("thai_name"), parts.get("email")) if v and v != title)
+    return make_doc(EMPLOYEE, emp_id, title, subtitle, [emp_id] + [parts.get(f) for f in USER_FIELDS[1:] + PERSONAL_FIELDS])
+
+def project_doc(project_id, parts: dict) -> SearchDoc:
+    subtitle = " · ".join(v for v in (parts.get("project_code"), parts.get("project_contract_no")) if v)
+    return make_doc(PROJECT, project_id, parts.get("project_name") or "", subtitle, [parts.get(f) for f in PROJECT_FIELDS])
+
+def client_doc(client_id, parts: dict) -> SearchDoc:
+    return make_doc(CLIENT, client_id, parts.get("client_name") or "", parts.get("client_code") or "", [parts.get(f) for f in CLIENT_FIELDS])
+
+def score_doc(doc: SearchDoc, query: str, query_grams: Optional[Set[str]] = None) -> float:
+    """Ranks one candidate; `query_grams` is only passed for fuzzy candidates that lack the substring."""
+    best = 0.0
+    for field in doc.fields:
+        if field.startswith(query):
+            if field == query:
+                best = 100.0
+                break
+            best = max(best, 90.0)
+        elif best < 50.0 and query in field:
+            best = 50.0
+    if best < 75.0 and any(token.startswith(query) for token in doc.tokens):
+        best = 75.0
+    if not best and query_grams:
+        best = max(40.0 * len(query_grams & trigrams(field)) / len(query_grams) for field in doc.fields)
+    ## prefer the shorter record among equal matches
+    return best - min(len(doc.title), 100) / 1000
+
+def _drop_posting(postings: Dict[str, Set[Tuple[str, str]]], term: str, key, ordered: Optional[List[str]] = None):
+    keys = postings.get(term)
+    if keys is None:
+        return
+    keys.discard(key)
+    if not keys:
+        del postings[term]
+        if ordered is not None:
+            del ordered[bisect.bisect_left(ordered, term)]
+
+class SearchIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._docs: Dict[Tuple[str, str], SearchDoc] = {}
+        self._exact: Dict[str, Set[Tuple[str, str]]] = defaultdict(set)
+        self._tokens: Dict[str, Set[Tuple[str, str]]] = defaultdict(set)
+        self._token_list: List[str] = []
+        self._grams: Dict[str, Set[Tuple[str, str]]] = defaultdict(set)
+        self._employee_parts: Dict[str, dict] = {}
+
+    def _unlink(self, key, keep_sorted: bool = True):
+        doc = self._docs.pop(key, None)
+        if doc is None:
+            return
+        ordered = self._token_list if keep_sorted else None
+        for field in doc.fields:
+            _drop_posting(self._exact, field, key)
+        for token in doc.tokens:
+            _drop_posting(self._tokens, token, key, ordered)
+        for gram in {g for f in doc.fields for g in trigrams(f)}:
+            _drop_posting(self._grams, gram, key)
+
+    def _link(self, doc: SearchDoc, keep_sorted: bool = True):
+        """With keep_sorted=False (bulk builds) `_token_list` is left alone; `replace` rebuilds it."""
+        key = doc.key
+        self._unlink(key, keep_sorted)
+        self._docs[key] = doc
+        exact, grams, tokens = self._exact, self._grams, self._tokens
+        for field in doc.fields:
+            exact[field].add(key)
+            for gram in trigrams(field):
+                grams[gram].add(key)
+        for token in doc.tokens:
+            if keep_sorted and token not in tokens:
+                bisect.insort(self._token_list, token)
+            tokens[token].add(key)
+
+    def apply(self, changes: Iterable[tuple], keep_sorted: bool = True):
+        """Applies (op, kind, id, parts) tuples; employee parts are merged across Users/PersonalInfo."""
+        with self._lock:
+            for op, kind, doc_id, parts in changes:
+                doc_id = str(doc_id)
+                if kind == EMPLOYEE:
+                    if op == "delete":
+                        self._employee_parts.pop(doc_id, None)
+                        self._unlink((kind, doc_id), keep_sorted)
+                        continue
+                    if op == "clear" and doc_id not in self._employee_parts:
+                        continue
+                    merged = self._employee_parts.setdefault(doc_id, {})
+                    merged.update(parts)
+                    self._link(employee_doc(doc_id, merged), keep_sorted)
+                elif op == "delete":
+                    self._unlink((kind, doc_id), keep_sorted)
+                else:
+                    self._link((project_doc if kind == PROJECT else client_doc)(doc_id, parts), keep_sorted)
+
+    def replace(self, changes: Iterable[tuple]):
+        fresh = SearchIndex()
+        fresh.apply(changes, keep_sorted=False)
+        fresh._token_list = sorted(fresh._tokens)
+        with self._lock:
+            self._docs, self._exact, self._grams = fresh._docs, fresh._exact, fresh._grams
+            self._tokens, self._token_list = fresh._tokens, fresh._token_list
+            self._employee_parts = fresh._employee_parts
+
+    def _candidates(self, query: str, query_grams: Set[str], kinds: Optional[Set[str]], limit: int) -> Dict[Tuple[str, str], bool]:
+        """
+        Collects at most SEARCH_CANDIDATES keys, strongest tier first: exact field values,
+        token prefixes, substrings, then (only if nothing matched so far) fuzzy trigram
+        matches. Maps each key to whether it is a fuzzy match.
+        """
+        found: Dict[Tuple[str, str], bool] = {}
+
+        def take(keys, fuzzy=False):
+            for key in keys:
+                if len(found) >= SEARCH_CANDIDATES:
+                    return
+                if key not in found and (kinds is None or key[0] in kinds):
+                    found[key] = fuzzy
+
+        take(self._exact.get(query, ()))
+        i = bisect.bisect_left(self._token_list, query)
+        while i < len(self._token_list) and self._token_list[i].startswith(query) and len(found) < SEARCH_CANDIDATES:
+            take(self._tokens[self._token_list[i]])
+            i += 1
+
+        if len(query) < 3 or len(found) >= SEARCH_CANDIDATES:
+            return found
+        postings = sorted((self._grams.get(g, set()) for g in query_grams), key=len)
+        ## walk the rarest trigram's postings lazily so a common substring stops at the cap
+        take(key for key in postings[0] if all(key in other for other in postings[1:]))
+        if not found:
+            ## typo tolerance: anything sharing at least half of the query's trigrams, counted
+            ## over the selective ones only so a typo inside a common word stays cheap
+            hits: Dict[Tuple[str, str], int] = defaultdict(int)
+            for posting in postings:
+                if len(posting) > SEARCH_CANDIDATES * 10:
+                    break
+                for key in posting:
+                    hits[key] += 1
+            take((key for key, n in hits.items() if n * 2 >= len(query_grams)), fuzzy=True)
+        return found
+
+    def search(self, text: str, kinds: Optional[Set[str]] = None, limit: int = 10) -> List[dict]:
+        query = normalize(text)
+        if not query:
+            return []
+        query_grams = trigrams(query)
+        with self._lock:
+            docs = [(self._docs[key], fuzzy) for key, fuzzy in self._candidates(query, query_grams, kinds, limit).items()]
+
+        ranked = heapq.nlargest(
+            limit,
+            ((score_doc(doc, query, query_grams if fuzzy else None), doc) for doc, fuzzy in docs),
+            key=lambda item: item[0],
+        )
+        return [
+            {"kind": doc.kind, "id": doc.id, "title": doc.title, "subtitle": doc.subtitle, "score": round(score, 3)}
+            for score, doc in ranked
+        ]
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+search_index = SearchIndex()
+
+def _change_for(obj, deleted: bool):
+    op = "delete" if deleted else "upsert"
+    if isinstance(obj, Users):
+        return (op, EMPLOYEE, obj.emp_id, {f: getattr(obj, f) for f in USER_FIELDS})
+    if isinstance(obj, PersonalInfo):
+        ## losing the personal record only clears the names; the employee stays searchable
+        return ("clear" if deleted else "upsert", EMPLOYEE, obj.emp_id, {f: (None if deleted else getattr(obj, f)) for f in PERSONAL_FIELDS})
+    if isinstance(obj, ProjectDetails):
+        return (op, PROJECT, obj.project_id, {f: getattr(obj, f) for f in PROJECT_FIELDS})
+    if isinstance(obj, Client):
+        return (op, CLIENT, obj.client_id, {f: getattr(obj, f) for f in CLIENT_FIELDS})
+    return None
+
+@event.listens_for(Session, "after_flush")
+def _collect_search_changes(session, flush_context):
+    pending = session.info.setdefault("search_index_changes", [])
+    for objects, deleted in ((session.new, False), (session.dirty, False), (session.deleted, True)):
+        for obj in objects:
+            change = _change_for(obj, deleted)
+            if change is not None:
+                pending.append(change)
+
+@event.listens_for(Session, "after_commit")
+def _apply_search_changes(session):
+    changes = session.info.pop("search_index_changes", None)
+    if changes:
+        search_index.apply(changes)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_search_changes(session):
+    session.info.pop("search_index_changes", None)
+
+def index_users(users: Iterable[Tuple[str, str]]):
+    """For rows written with Core inserts, which bypass the session events."""
+    search_index.apply(("upsert", EMPLOYEE, emp_id, {"emp_id": emp_id, "email": email}) for emp_id, email in users)
+
+def build_changes(users, personal, projects, clients) -> List[tuple]:
+    """Upserts for a full build: one per employee, with its Users and PersonalInfo rows merged."""
+    employees = {row.emp_id: {"emp_id": row.emp_id, "email": row.email} for row in users}
+    for row in personal:
+        employees.setdefault(row.emp_id, {"emp_id": row.emp_id}).update({f: getattr(row, f) for f in PERSONAL_FIELDS})
+    changes = [("upsert", EMPLOYEE, emp_id, parts) for emp_id, parts in employees.items()]
+    changes += [("upsert", PROJECT, row.project_id, {f: getattr(row, f) for f in PROJECT_FIELDS}) for row in projects]
+    changes += [("upsert", CLIENT, row.client_id, {f: getattr(row, f) for f in CLIENT_FIELDS}) for row in clients]
+    return changes
+
+async def build_search_index():
+    async with AsyncSessionLocal() as session:
+        users = (await session.execute(select(Users.emp_id, Users.email))).all()
+        personal = (await session.execute(select(PersonalInfo.emp_id, *(getattr(PersonalInfo, f) for f in PERSONAL_FIELDS)))).all()
+        projects = (await session.execute(select(ProjectDetails.project_id, *(getattr(ProjectDetails, f) for f in PROJECT_FIELDS)))).all()
+        clients = (await session.execute(select(Client.client_id, *(getattr(Client, f) for f in CLIENT_FIELDS)))).all()
+
+    await asyncio.to_thread(search_index.replace, build_changes(users, personal, projects, clients))
+    logging.info(f"Search index built with {len(search_index)} records")
+
+async def rebuild_search_index_periodically():
+    if SEARCH_INDEX_REBUILD_SECONDS <= 0:
+        return
+    while True:
+        await asyncio.sleep(SEARCH_INDEX_REBUILD_SECONDS)
+        try:
+            await build_search_index()
+        except Exception as e:
+            logging.error(f"Failed to rebuild search index: {e}")
@@ -0,0 +1,84 @@
+"""
+Periodic clean-up of refresh_token rows that can no longer authenticate anyone.
+
+A row is purged once its refresh token has expired, or once it was revoked longer
+ago than an access token lives (after that it no longer needs to sit in the
+revocation set). Each rule is purged separately so its lookup is a range scan on its
+own index (created_date, or status + revoked_date). Rows go in batches of
+TOKEN_PURGE_BATCH_SIZE, each in its own short transaction, so a purge never holds
+locks for long.
+"""
+import asyncio, logging, os, time
+from datetime import datetime, timedelta
+from sqlalchemy import delete, select
+
+from database.db import AsyncSessionLocal
+from models.auth_model import RefreshToken
+from utils.jwt_util import ACCESS_TOKEN_EXPIRE_MINUTES, REFRESH_TOKEN_EXPIRE_MINUTES
+
+TOKEN_PURGE_INTERVAL_SECONDS = int(os.getenv("TOKEN_PURGE_INTERVAL_SECONDS", 3600))
+TOKEN_PURGE_BATCH_SIZE = int(os.getenv("TOKEN_PURGE_BATCH_SIZE", 500))
+
+purge_stats = {
+    "runs": 0,
+    "total_purged": 0,
+    "last_purged": 0,
+    "last_duration_ms": 0.0,
+    "last_finished_at": None,
+}
+
+def purgeable_conditions(now: datetime):
+    return [
+        ## ix_refresh_token_created_date
+        (RefreshToken.created_date < now - timedelta(minutes=REFRESH_TOKEN_EXPIRE_MINUTES),),
+        ## ix_refresh_token_status_revoked_date
+        (
+            RefreshToken.status == False,
+            RefreshToken.revoked_date < now - timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES),
+        ),
+    ]
+
+async def purge_matching_tokens(condition) -> int:
+    purged = 0
+    while True:
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(RefreshToken.id)
+                .filter(*condition)
+                .limit(TOKEN_PURGE_BATCH_SIZE)
+            )
+            ids = result.scalars().all()
+            if not ids:
+                break
+            await session.execute(delete(RefreshToken).where(RefreshToken.id.in_(ids)))
+            await session.commit()
+        purged += len(ids)
+        if len(ids) < TOKEN_PURGE_BATCH_SIZE:
+            break
+        ## Yield between batches so request handlers on this worker aren't starved.
+        await asyncio.sleep(0)
+    return purged
+
+async def purge_expired_tokens() -> int:
+    start = time.perf_counter()
+    now = datetime.now()
+    purged = 0
+    for condition in purgeable_conditions(now):
+        purged += await purge_matching_tokens(condition)
+
+    duration_ms = (time.perf_counter() - start) * 1000
+    purge_stats["runs"] += 1
+    purge_stats["total_purged"] += purged
+    purge_stats["last_purged"] = purged
+    purge_stats["last_duration_ms"] = round(duration_ms, 1)
+    purge_stats["last_finished_at"] = datetime.now().isoformat()
+    logging.info(f"Purged {purged} refresh_token rows in {duration_ms:.1f} ms")
+    return purged
+
+async def purge_expired_tokens_periodically():
+    while True:
+        try:
+            await purge_expired_tokens()
+        except Exception as e:
+            logging.error(f"Failed to purge refresh_token rows: {e}")
+        await asyncio.sleep(TOKEN_PURGE_INTERVAL_SECONDS)